@@ -68,4 +68,10 @@ CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 LINKEDIN_CLIENT_ID = os.getenv("LINKEDIN_CLIENT_ID")
 LINKEDIN_CLIENT_SECRET = os.getenv("LINKEDIN_CLIENT_SECRET")
 LINKEDIN_REDIRECT_URI = os.getenv("LINKEDIN_REDIRECT_URI", "http://localhost:8000/accounts/linkedin/callback")
-LINKEDIN_ORGANIZATION_ID = os.getenv("LINKEDIN_ORGANIZATION_ID")
\ No newline at end of file
+LINKEDIN_ORGANIZATION_ID = os.getenv("LINKEDIN_ORGANIZATION_ID")
+
+# Ephemeral state (rate limits, OAuth states): "memory" for one worker, "mongo" to share across workers
+EPHEMERAL_STORE_BACKEND = os.getenv("EPHEMERAL_STORE_BACKEND", "memory").lower()
+
+# Carousel normalization: "crop" (center-crop) or "pad" items to a common aspect ratio
+CAROUSEL_NORMALIZE_MODE = os.getenv("CAROUSEL_NORMALIZE_MODE", "crop").lower()
@@ -16,11 +16,13 @@ from app.routes.feedback import router as feedback_router
 from app.routes.admin import router as admin_router
 from app.services.scheduler import start_scheduler, shutdown_scheduler
 from app.services.database import init_automation_indexes
+from app.services.migrations import run_startup_migrations
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize automation indexes and start the scheduler
+    # Startup: Apply data migrations, initialize indexes and start the scheduler
+    run_startup_migrations()
     init_automation_indexes()
     start_scheduler()
     yield
@@ -24,7 +24,10 @@ class MediaItem(BaseModel):
     url: str  # Public URL from Cloudinary
     base64: Optional[str] = None  # Base64 data (for new uploads)
     thumbnail: Optional[str] = None  # Thumbnail URL (for videos)
-    duration: Optional[int] = None  # Duration in seconds (for videos)
+    duration: Optional[float] = None  # Duration in seconds (for videos)
+    width: Optional[int] = None  # Pixel width, recorded at upload
+    height: Optional[int] = None  # Pixel height, recorded at upload
+    format: Optional[str] = None  # File format reported by Cloudinary (e.g. "jpg", "mp4")
     order: int = 0  # Order in the post
 
 
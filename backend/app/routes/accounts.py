@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException
 import logging
 import requests
 import secrets
-from datetime import datetime, timedelta
 from urllib.parse import urlencode
 from app.config import config
 from app.schemas.social_accounts import ConnectAccountRequest, MetaOAuthCallbackRequest
 from app.services.dependencies import get_current_user
+from app.services.ephemeral_store import get_ephemeral_store
 from app.services.social_accounts import (
     get_user_social_accounts,
     remove_platform_credentials,
@@ -17,9 +17,6 @@ from app.services.social_accounts import (
 router = APIRouter(prefix="/accounts", tags=["Accounts"])
 logger = logging.getLogger(__name__)
 
-_meta_oauth_state_cache = {}
-
-
 def _require_meta_oauth_config() -> None:
     missing = []
     if not config.META_APP_ID:
@@ -37,20 +34,19 @@ def _require_meta_oauth_config() -> None:
 
 def _issue_meta_oauth_state(user_id: str) -> str:
     state = secrets.token_urlsafe(32)
-    _meta_oauth_state_cache[state] = {
-        "user_id": user_id,
-        "expires_at": datetime.utcnow() + timedelta(seconds=config.META_OAUTH_STATE_TTL_SECONDS),
-    }
+    get_ephemeral_store().set(
+        f"meta_oauth_state:{state}",
+        {"user_id": user_id},
+        ttl_seconds=config.META_OAUTH_STATE_TTL_SECONDS,
+    )
     return state
 
 
 def _consume_meta_oauth_state(state: str, user_id: str) -> None:
-    record = _meta_oauth_state_cache.pop(state, None)
+    # take() is atomic, so a state can be redeemed once even across workers
+    record = get_ephemeral_store().take(f"meta_oauth_state:{state}")
     if not record:
-        raise HTTPException(status_code=400, detail="Invalid OAuth state")
-
-    if datetime.utcnow() > record["expires_at"]:
-        raise HTTPException(status_code=400, detail="OAuth state has expired")
+        raise HTTPException(status_code=400, detail="Invalid or expired OAuth state")
 
     if record["user_id"] != user_id:
         raise HTTPException(status_code=403, detail="OAuth state does not belong to this user")
@@ -2,6 +2,7 @@ from datetime import datetime
 
 import bcrypt
 from fastapi import APIRouter, Depends, HTTPException, Query
+from pymongo.errors import DuplicateKeyError
 
 from app.config.config import ADMIN_REGISTRATION_SECRET
 from app.schemas.users import AdminRegister
@@ -21,20 +22,24 @@ def register_admin(payload: AdminRegister):
         raise HTTPException(status_code=403, detail="Invalid admin invite code")
 
     normalized_email = payload.email.strip().lower()
-    existing = users_collection.find_one({"email": normalized_email})
+    existing = users_collection.find_one({"email_lower": normalized_email}, {"_id": 1})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     hashed_password = bcrypt.hashpw(payload.password.encode("utf-8"), bcrypt.gensalt())
-    users_collection.insert_one(
-        {
-            "username": payload.username,
-            "email": normalized_email,
-            "password": hashed_password,
-            "role": "admin",
-            "created_at": datetime.utcnow(),
-        }
-    )
+    try:
+        users_collection.insert_one(
+            {
+                "username": payload.username,
+                "email": normalized_email,
+                "email_lower": normalized_email,
+                "password": hashed_password,
+                "role": "admin",
+                "created_at": datetime.utcnow(),
+            }
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"status": "success", "message": "Admin registered successfully"}
 
 
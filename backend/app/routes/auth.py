@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Request
 from app.schemas.users import UserRegister, UserLogin, ForgotPasswordRequest, ResetPasswordConfirm   #  schemas
 from app.services.database import users_collection      #  database connection
+from app.services.dependencies import invalidate_user_principal
+from app.services.ephemeral_store import get_ephemeral_store
 from app.config.config import (
     SECRET_KEY,
     ALGORITHM,
@@ -13,24 +15,20 @@ from app.config.config import (
 from datetime import datetime, timedelta
 import bcrypt
 from jose import jwt
+from pymongo.errors import DuplicateKeyError
 import hashlib
-import re
 import secrets
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-# In-memory rate limit buckets: {(ip, email): [datetime, ...]}
-_password_reset_buckets = {}
-
-
 def _enforce_password_reset_rate_limit(ip_address: str, email: str):
-    now = datetime.utcnow()
-    window_start = now - timedelta(minutes=RESET_RATE_LIMIT_WINDOW_MINUTES)
-    bucket_key = (ip_address, email.lower())
-    attempts = _password_reset_buckets.get(bucket_key, [])
-    attempts = [timestamp for timestamp in attempts if timestamp >= window_start]
+    # Fixed window per (ip, email), shared across workers by the ephemeral store
+    attempts = get_ephemeral_store().increment(
+        f"password_reset:{ip_address}:{email.lower()}",
+        ttl_seconds=RESET_RATE_LIMIT_WINDOW_MINUTES * 60,
+    )
 
-    if len(attempts) >= RESET_RATE_LIMIT_MAX_REQUESTS:
+    if attempts > RESET_RATE_LIMIT_MAX_REQUESTS:
         raise HTTPException(
             status_code=429,
             detail=(
@@ -38,9 +36,6 @@ def _enforce_password_reset_rate_limit(ip_address: str, email: str):
             ),
         )
 
-    attempts.append(now)
-    _password_reset_buckets[bucket_key] = attempts
-
 
 def _hash_reset_token(raw_token: str) -> str:
     return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
@@ -51,32 +46,38 @@ def _normalize_email(email: str) -> str:
 
 
 def _email_query(email: str):
-    normalized = _normalize_email(email)
-    # Case-insensitive exact match for backward compatibility with older mixed-case records.
-    return {"email": {"$regex": f"^{re.escape(normalized)}$", "$options": "i"}}
+    # Exact match on the normalized field, served by the unique email_lower index
+    return {"email_lower": _normalize_email(email)}
 
 def create_jwt_token(sub: str):
     """Create JWT token with user ID as subject"""
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    payload = {"sub": sub, "exp": expire}
+    issued_at = datetime.utcnow()
+    expire = issued_at + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # iat keys the principal cache and lets password changes revoke older tokens
+    payload = {"sub": sub, "iat": issued_at, "exp": expire}
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 @router.post("/register")
 def register_user(user: UserRegister):
     """Register a new user"""
     normalized_email = _normalize_email(user.email)
-    existing = users_collection.find_one(_email_query(normalized_email))
+    existing = users_collection.find_one(_email_query(normalized_email), {"_id": 1})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     hashed_pw = bcrypt.hashpw(user.password.encode("utf-8"), bcrypt.gensalt())
-    users_collection.insert_one({
-        "email": normalized_email,
-        "username": user.username,
-        "password": hashed_pw,
-        "role": "user",
-        "created_at": datetime.utcnow()
-    })
+    try:
+        users_collection.insert_one({
+            "email": normalized_email,
+            "email_lower": normalized_email,
+            "username": user.username,
+            "password": hashed_pw,
+            "role": "user",
+            "created_at": datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        # Concurrent registration with the same email
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "User registered successfully"}
 
 @router.post("/login")
@@ -85,7 +86,7 @@ def login_user(user: UserLogin):
     normalized_email = _normalize_email(user.email)
     existing = users_collection.find_one(
         _email_query(normalized_email),
-        sort=[("updated_at", -1), ("created_at", -1)],
+        {"password": 1, "role": 1},
     )
     if not existing:
         raise HTTPException(status_code=404, detail="User not found")
@@ -104,10 +105,7 @@ def request_password_reset(payload: ForgotPasswordRequest, request: Request):
     normalized_email = _normalize_email(payload.email)
     _enforce_password_reset_rate_limit(client_ip, normalized_email)
 
-    existing = users_collection.find_one(
-        _email_query(normalized_email),
-        sort=[("updated_at", -1), ("created_at", -1)],
-    )
+    existing = users_collection.find_one(_email_query(normalized_email), {"_id": 1})
 
     # Return generic message even if user does not exist to reduce account enumeration risk.
     generic_message = "If your account exists, a password reset code has been generated."
@@ -145,7 +143,7 @@ def confirm_password_reset(payload: ResetPasswordConfirm):
     normalized_email = _normalize_email(payload.email)
     existing = users_collection.find_one(
         _email_query(normalized_email),
-        sort=[("updated_at", -1), ("created_at", -1)],
+        {"password_reset": 1},
     )
     if not existing:
         raise HTTPException(status_code=404, detail="Invalid reset request")
@@ -166,16 +164,20 @@ def confirm_password_reset(payload: ResetPasswordConfirm):
         raise HTTPException(status_code=401, detail="Invalid reset token")
 
     new_hashed_pw = bcrypt.hashpw(payload.new_password.encode("utf-8"), bcrypt.gensalt())
-    users_collection.update_many(
-        _email_query(normalized_email),
+    changed_at = datetime.utcnow()
+    users_collection.update_one(
+        {"_id": existing["_id"]},
         {
             "$set": {
                 "email": normalized_email,
+                "email_lower": normalized_email,
                 "password": new_hashed_pw,
-                "updated_at": datetime.utcnow(),
+                "updated_at": changed_at,
+                "password_changed_at": changed_at,
                 "password_reset.used": True,
             }
         },
     )
+    invalidate_user_principal(existing["_id"])
 
     return {"message": "Password reset successful. Please sign in with your new password."}
\ No newline at end of file
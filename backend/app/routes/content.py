@@ -7,6 +7,11 @@ from app.services.database import posts_collection
 from app.models import GeneratedContent
 from app.services.dependencies import get_current_user
 from app.services.image_service import ImageService
+from app.services.post_dispatcher import notify_post_scheduled
+from app.services.media_offload import offload_post_media, thumbnail_url
+from app.services.post_owner import owner_fields
+from app.services.post_stats import get_post_stats as load_post_stats, record_post_created
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import re
 
@@ -16,6 +21,9 @@ router = APIRouter(prefix="/content", tags=["Content"])
 # Pakistani Standard Time (UTC+5)
 PAKISTAN_TZ = pytz.timezone('Asia/Karachi')
 
+# Bounded pool for uploading media items in /content/save
+SAVE_MEDIA_MAX_WORKERS = 4
+
 
 def _to_pakistan_time(dt: datetime) -> datetime:
     if dt.tzinfo is None:
@@ -103,6 +111,61 @@ def _validate_prompt_quality(prompt: str):
 
 
 
+def _media_metadata(source: dict) -> dict:
+    """Dimensions/duration/format recorded at upload, used later for publish validation"""
+    return {
+        key: source[key]
+        for key in ("width", "height", "duration", "format")
+        if source.get(key) is not None
+    }
+
+
+def _process_media_item(idx: int, media_item, owner_id: str) -> dict | None:
+    """Upload a single base64 media item to Cloudinary (or pass a URL through)"""
+    try:
+        # Check if media_item has a URL (either from /media/upload endpoint or base64)
+        if not isinstance(media_item, dict):
+            print(f"⚠ Media item {idx+1} is not a dict, skipping")
+            return None
+        
+        media_url = media_item.get("url")
+        media_type = media_item.get("type", "image")
+        
+        # If it's a base64 string, upload to Cloudinary
+        if media_url and media_url.startswith("data:"):
+            print(f"Uploading media item {idx+1} to Cloudinary...")
+            upload_result = ImageService.upload_base64_to_cloudinary(media_url, media_type, owner_id)
+            
+            if upload_result["status"] != "success":
+                print(f"⚠ Failed to upload media item {idx+1}: {upload_result.get('detail')}")
+                return None
+            
+            print(f"✓ Media item {idx+1} uploaded to {upload_result['url']}")
+            thumbnail = thumbnail_url(upload_result["url"], media_type)
+            return {
+                "type": media_type,
+                "url": upload_result["url"],
+                "public_id": upload_result.get("public_id"),
+                **_media_metadata(upload_result),
+                **({"thumbnail": thumbnail} if thumbnail else {}),
+                "order": idx
+            }
+        
+        # Already a URL (from /media/upload endpoint), use as-is and keep its upload metadata
+        print(f"✓ Media item {idx+1} already uploaded: {media_url}")
+        return {
+            "type": media_type,
+            "url": media_url,
+            **({"id": media_item["id"]} if media_item.get("id") else {}),
+            **({"thumbnail": media_item["thumbnail"]} if media_item.get("thumbnail") else {}),
+            **_media_metadata(media_item),
+            "order": idx
+        }
+    except Exception as e:
+        print(f"⚠ Error processing media item {idx+1}: {str(e)}")
+        return None
+
+
 @router.post("/save")
 def save_content(content: GeneratedContent, user: dict = Depends(get_current_user)):
     try:
@@ -114,7 +177,7 @@ def save_content(content: GeneratedContent, user: dict = Depends(get_current_use
         print(f"Content dict keys: {content_data.keys()}")
         print(f"Scheduled_at: {content_data.get('scheduled_at')}")
         
-        content_data["user_id"] = str(user["_id"])
+        content_data.update(owner_fields(user["_id"]))
         content_data["created_at"] = datetime.now(PAKISTAN_TZ)
         
         # If scheduled_at is provided, normalize it to Pakistani timezone
@@ -133,52 +196,32 @@ def save_content(content: GeneratedContent, user: dict = Depends(get_current_use
         
         # ✅ Upload media to Cloudinary if provided
         if content_data.get("media") and isinstance(content_data["media"], list):
-            print(f"Processing {len(content_data['media'])} media items...")
-            cloudinary_media = []
+            media_items = content_data["media"]
+            print(f"Processing {len(media_items)} media items...")
             
-            for idx, media_item in enumerate(content_data["media"]):
-                try:
-                    # Check if media_item has a URL (either from /media/upload endpoint or base64)
-                    if isinstance(media_item, dict):
-                        media_url = media_item.get("url")
-                        media_type = media_item.get("type", "image")
-                        
-                        # If it's a base64 string, upload to Cloudinary
-                        if media_url and media_url.startswith("data:"):
-                            print(f"Uploading media item {idx+1} to Cloudinary...")
-                            upload_result = ImageService.upload_base64_to_cloudinary(media_url, media_type)
-                            
-                            if upload_result["status"] == "success":
-                                cloudinary_media.append({
-                                    "type": media_type,
-                                    "url": upload_result["url"],
-                                    "public_id": upload_result.get("public_id"),
-                                    "order": idx
-                                })
-                                print(f"✓ Media item {idx+1} uploaded to {upload_result['url']}")
-                            else:
-                                print(f"⚠ Failed to upload media item {idx+1}: {upload_result.get('detail')}")
-                        else:
-                            # Already a URL (from /media/upload endpoint), use as-is
-                            cloudinary_media.append({
-                                "type": media_type,
-                                "url": media_url,
-                                "order": idx
-                            })
-                            print(f"✓ Media item {idx+1} already uploaded: {media_url}")
-                    else:
-                        print(f"⚠ Media item {idx+1} is not a dict, skipping")
-                        
-                except Exception as e:
-                    print(f"⚠ Error processing media item {idx+1}: {str(e)}")
-                    continue
+            # Upload items in parallel; executor.map keeps results in input order
+            max_workers = min(SAVE_MEDIA_MAX_WORKERS, len(media_items))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                processed = list(executor.map(
+                    _process_media_item,
+                    range(len(media_items)),
+                    media_items,
+                    [content_data["owner_id"]] * len(media_items),
+                ))
             
+            cloudinary_media = [item for item in processed if item]
             content_data["media"] = cloudinary_media
             print(f"✓ Processed {len(cloudinary_media)} media items")
         
+        # Move an inline base64 image (and any inline thumbnails) to Cloudinary too
+        content_data.update(offload_post_media(content_data, content_data["owner_id"]))
+        
         print(f"Final content_data: {content_data}")
         result = posts_collection.insert_one(content_data)
         print(f"✓ Saved successfully with ID: {result.inserted_id}")
+        record_post_created(content_data["owner_id"], content_data["status"])
+        if content_data["status"] == "scheduled":
+            notify_post_scheduled(result.inserted_id, content_data["scheduled_at"])
         
         return {
             "status": "success",
@@ -248,18 +291,7 @@ async def analyze_text_sentiment(request: SentimentRequest):
     
 @router.get("/stats")
 async def get_post_stats(user: dict = Depends(get_current_user)):
-    user_id = user["_id"]
-    total = posts_collection.count_documents({"user_id": user_id})
-    drafts = posts_collection.count_documents({"user_id": user_id, "status": "draft"})
-    scheduled = posts_collection.count_documents({"user_id": user_id, "status": "scheduled"})
-    published = posts_collection.count_documents({"user_id": user_id, "status": "published"})
-
     return {
         "status": "success",
-        "stats": {
-            "total_posts": total,
-            "drafts": drafts,
-            "scheduled": scheduled,
-            "published": published
-        }
+        "stats": load_post_stats(user["_id"])
     }
\ No newline at end of file
@@ -1,37 +1,32 @@
-from collections import defaultdict, deque
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.schemas.feedback_schema import FeedbackCreate, FeedbackListQuery
 from app.services.database import feedback_collection
 from app.services.dependencies import get_current_user
+from app.services.ephemeral_store import get_ephemeral_store
 from app.services.feedback_service import FEATURE_OPTIONS, FeedbackService
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
-# Simple in-memory anti-spam throttle: max 5 submissions in 10 minutes per user.
+# Simple anti-spam throttle: max 5 submissions in 10 minutes per user.
 _FEEDBACK_WINDOW = timedelta(minutes=10)
 _FEEDBACK_LIMIT = 5
-_feedback_submit_log = defaultdict(deque)
 
 
 def _enforce_feedback_rate_limit(user_id: str) -> None:
-    now = datetime.now(timezone.utc)
-    window_start = now - _FEEDBACK_WINDOW
-    user_events = _feedback_submit_log[user_id]
-
-    while user_events and user_events[0] < window_start:
-        user_events.popleft()
+    submissions = get_ephemeral_store().increment(
+        f"feedback_submit:{user_id}",
+        ttl_seconds=_FEEDBACK_WINDOW.total_seconds(),
+    )
 
-    if len(user_events) >= _FEEDBACK_LIMIT:
+    if submissions > _FEEDBACK_LIMIT:
         raise HTTPException(
             status_code=429,
             detail="Too many feedback submissions. Please wait a few minutes.",
         )
 
-    user_events.append(now)
-
 
 @router.get("/features")
 def list_feedback_features(user: dict = Depends(get_current_user)):
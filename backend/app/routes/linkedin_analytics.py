@@ -6,14 +6,12 @@ from app.services.dependencies import get_current_user
 from app.services.social_accounts import get_platform_credentials
 from app.services.linkedin_service import LinkedInService
 from app.services.comment_reply_service import CommentReplyService
-from app.services.database import db
+from app.services.database import linkedin_posts_collection
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/analytics/linkedin", tags=["LinkedIn Analytics"])
 logger = logging.getLogger(__name__)
 
-linkedin_posts_collection = db["linkedin_posts"]
-
 
 class AutoReplyToggle(BaseModel):
     enabled: bool
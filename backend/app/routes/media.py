@@ -1,16 +1,105 @@
 from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from app.services.cloudinary_service import CloudinaryService
+from app.services import media_registry
 from app.services.database import posts_collection
 from app.services.dependencies import get_current_user
+from app.services.post_owner import owner_of
 from app.schemas.post_schema import MediaItem
 from bson import ObjectId
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/media", tags=["Media"])
 
 
+def _upload_file_size(file: UploadFile) -> int:
+    """Size of an uploaded file, measured by seeking its spooled temp file"""
+    file.file.seek(0, 2)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+def _upload_single_media(idx: int, file: UploadFile, owner_id: str) -> MediaItem:
+    """Stream one spooled upload to Cloudinary (runs in a worker thread)"""
+    content_type = file.content_type or ""
+    resource_type = "image" if content_type.startswith("image/") else "video"
+    
+    # Skip the transfer entirely if this user already uploaded this exact content
+    digest = media_registry.hash_file(file.file)
+    existing = media_registry.find_by_hash(digest, resource_type, owner_id)
+    if existing:
+        logger.info(f"Reusing registered {resource_type} for {file.filename}: {existing['url']}")
+        return MediaItem(
+            id=existing.get("public_id"),
+            type=resource_type,
+            url=existing["url"],
+            thumbnail=existing.get("thumbnail"),
+            duration=existing.get("duration"),
+            width=existing.get("width"),
+            height=existing.get("height"),
+            format=existing.get("format"),
+            order=idx
+        )
+    
+    if resource_type == "image":
+        fingerprint = media_registry.compute_image_fingerprint(file.file)
+        result = CloudinaryService.upload_image_stream(file.file)
+        
+        if result["status"] != "success":
+            raise HTTPException(status_code=500, detail=f"Failed to upload {file.filename}: {result.get('detail')}")
+        
+        media_item = MediaItem(
+            id=result.get("public_id"),
+            type="image",
+            url=result.get("url"),
+            width=result.get("width") or fingerprint.get("width"),
+            height=result.get("height") or fingerprint.get("height"),
+            format=result.get("format"),
+            order=idx
+        )
+    else:
+        # Videos go through Cloudinary's chunked upload API
+        fingerprint = {}
+        result = CloudinaryService.upload_video_stream(file.file)
+        
+        if result["status"] != "success":
+            raise HTTPException(status_code=500, detail=f"Failed to upload {file.filename}: {result.get('detail')}")
+        
+        media_item = MediaItem(
+            id=result.get("public_id"),
+            type="video",
+            url=result.get("url"),
+            thumbnail=result.get("thumbnail"),
+            duration=result.get("duration"),
+            width=result.get("width"),
+            height=result.get("height"),
+            format=result.get("format"),
+            order=idx
+        )
+    
+    media_registry.register_media(
+        digest,
+        resource_type,
+        result.get("url"),
+        result.get("public_id"),
+        owner_id=owner_id,
+        mime_type=content_type,
+        width=result.get("width") or fingerprint.get("width"),
+        height=result.get("height") or fingerprint.get("height"),
+        duration=result.get("duration"),
+        format=result.get("format"),
+        thumbnail=result.get("thumbnail"),
+        phash=fingerprint.get("phash"),
+    )
+    
+    logger.info(f"Uploaded {file.filename} ({content_type})")
+    return media_item
+
+
 @router.post("/upload")
 async def upload_media(
     files: List[UploadFile] = File(...),
@@ -19,6 +108,9 @@ async def upload_media(
     """
     Upload single or multiple media files (images or videos)
     
+    Files are streamed from their spooled temp files straight to Cloudinary
+    (no full read into memory, no base64), and up to 10 files upload concurrently.
+    
     Returns:
         {"status": "success", "media": [MediaItem, ...]}
     """
@@ -29,79 +121,25 @@ async def upload_media(
         if len(files) > 10:
             raise HTTPException(status_code=400, detail="Maximum 10 files per upload")
         
-        media_list = []
-        
-        for idx, file in enumerate(files):
-            # Read file content
-            content = await file.read()
-            file_size = len(content)
+        # Validate every file before uploading any of them
+        for file in files:
+            content_type = file.content_type or ""
+            if not (content_type.startswith("image/") or content_type.startswith("video/")):
+                raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.content_type}")
             
-            # Validate file
             validation = CloudinaryService.validate_file(
-                file_size=file_size,
-                file_type=file.content_type,
+                file_size=_upload_file_size(file),
+                file_type=content_type,
                 file_name=file.filename
             )
             
             if validation["status"] != "valid":
                 raise HTTPException(status_code=400, detail=validation["detail"])
-            
-            # Determine file type
-            if file.content_type.startswith("image/"):
-                # Convert image to base64
-                import base64
-                image_base64 = base64.b64encode(content).decode("utf-8")
-                
-                # Upload to Cloudinary
-                result = CloudinaryService.upload_image(
-                    f"data:{file.content_type};base64,{image_base64}"
-                )
-                
-                if result["status"] != "success":
-                    raise HTTPException(status_code=500, detail=f"Failed to upload {file.filename}: {result.get('detail')}")
-                
-                media_item = MediaItem(
-                    id=result.get("public_id"),
-                    type="image",
-                    url=result.get("url"),
-                    order=idx
-                )
-            
-            elif file.content_type.startswith("video/"):
-                # For videos, we need to handle them differently
-                # Save to temp and upload as file path
-                import tempfile
-                import os
-                
-                temp_dir = tempfile.gettempdir()
-                temp_path = os.path.join(temp_dir, file.filename)
-                
-                with open(temp_path, "wb") as temp_file:
-                    temp_file.write(content)
-                
-                # Upload to Cloudinary
-                result = CloudinaryService.upload_video(video_file_path=temp_path)
-                
-                # Clean up temp file
-                os.remove(temp_path)
-                
-                if result["status"] != "success":
-                    raise HTTPException(status_code=500, detail=f"Failed to upload {file.filename}: {result.get('detail')}")
-                
-                media_item = MediaItem(
-                    id=result.get("public_id"),
-                    type="video",
-                    url=result.get("url"),
-                    thumbnail=result.get("thumbnail"),
-                    duration=result.get("duration"),
-                    order=idx
-                )
-            
-            else:
-                raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.content_type}")
-            
-            media_list.append(media_item)
-            logger.info(f"Uploaded {file.filename} ({file.content_type})")
+        
+        media_list = await asyncio.gather(*[
+            run_in_threadpool(_upload_single_media, idx, file, str(user["_id"]))
+            for idx, file in enumerate(files)
+        ])
         
         return {
             "status": "success",
@@ -127,11 +165,8 @@ async def validate_media(
         {"status": "valid"} or {"status": "invalid", "detail": "..."}
     """
     try:
-        content = await file.read()
-        file_size = len(content)
-        
         validation = CloudinaryService.validate_file(
-            file_size=file_size,
+            file_size=_upload_file_size(file),
             file_type=file.content_type,
             file_name=file.filename
         )
@@ -151,10 +186,17 @@ async def delete_media(
     """
     Delete a media file from Cloudinary
     
+    Only the user who uploaded the asset (per the media registry) may delete it.
+    
     Args:
         media_id: Cloudinary public ID
     """
     try:
+        user_id = str(user["_id"])
+        registered = media_registry.find_by_public_id(media_id)
+        if not registered or registered.get("owner_id") != user_id:
+            raise HTTPException(status_code=403, detail="Not allowed to delete this media")
+        
         # Determine if image or video by checking Cloudinary
         metadata = CloudinaryService.get_media_metadata(media_id)
         
@@ -169,6 +211,9 @@ async def delete_media(
         if result["status"] != "success":
             raise HTTPException(status_code=500, detail=result.get("detail"))
         
+        # Never hand the deleted asset out as a dedup hit again
+        media_registry.forget_media(media_id, user_id)
+        
         return {"status": "success", "message": f"Media {media_id} deleted"}
     
     except HTTPException:
@@ -198,7 +243,7 @@ async def reorder_media(
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
         
-        if str(post["user_id"]) != str(user["_id"]):
+        if owner_of(post) != str(user["_id"]):
             raise HTTPException(status_code=403, detail="You don't have permission to edit this post")
         
         # Update media order
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.services.ai_service import AIService
 from app.services.dependencies import get_current_user
 from app.services.database import posts_collection
@@ -10,10 +10,21 @@ from app.services.linkedin_service import LinkedInService
 from app.services.social_accounts import get_platform_credentials
 from app.services.job_tracker import job_tracker
 from app.services.media_validator import validate_carousel_aspect_ratios, format_aspect_ratio_error
-from datetime import datetime, timezone
+from app.services.carousel_normalizer import normalize_carousel_media
+from app.services.post_dispatcher import notify_post_scheduled, notify_post_unscheduled
+from app.services.media_offload import offload_post_media, thumbnail_url
+from app.services.post_owner import OWNER_PROJECTION, owner_fields, owner_of, owner_query
+from app.services.post_stats import (
+    get_post_stats as load_post_stats,
+    record_post_created,
+    record_post_deleted,
+    record_post_status_change,
+)
+from datetime import datetime, timedelta, timezone
 import pytz
 from bson import ObjectId
 from typing import List
+import base64
 import logging
 import threading
 
@@ -67,53 +78,285 @@ async def create_post(post: PostCreate, user: dict = Depends(get_current_user)):
             "caption": caption,
             "hashtags": hashtags,
             "image": image,
-            "created_by": user_id,
-            "user_id": user_id,
+            **owner_fields(user_id),
             "status": "draft",
             "created_at": datetime.now(PAKISTAN_TZ)
         }
+        # Generated images can come back as base64; store a hosted URL instead
+        post_data.update(offload_post_media(post_data, user_id))
 
         result = posts_collection.insert_one(post_data)
         post_data["_id"] = str(result.inserted_id)
+        record_post_created(user_id, post_data["status"])
 
         return {"status": "success", "post": post_data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _serialize_post(p: dict) -> dict:
+    """Convert ObjectId and datetimes to serializable values"""
+    p["_id"] = str(p["_id"])
+    for field in ("created_at", "scheduled_at", "published_at"):
+        if field in p and hasattr(p[field], "isoformat"):
+            p[field] = _serialize_to_pakistan_time(p[field])
+    return p
+
+
+def _hosted_url(expr) -> dict:
+    """Aggregation expression: expr if it is a string URL, null for data URIs and non-strings"""
+    return {
+        "$cond": [
+            {"$and": [
+                {"$eq": [{"$type": expr}, "string"]},
+                {"$ne": [{"$substrCP": [expr, 0, 5]}, "data:"]},
+            ]},
+            expr,
+            None,
+        ]
+    }
+
+
+# Listing fields; `image` and `media` can hold inline base64 and are left to the detail endpoint
+POST_SUMMARY_PROJECTION = {
+    "title": 1,
+    "topic": 1,
+    "caption": 1,
+    "hashtags": 1,
+    "platforms": 1,
+    "status": 1,
+    "created_at": 1,
+    "scheduled_at": 1,
+    "published_at": 1,
+    "platform_results": 1,
+    "thumbnail": {
+        "$let": {
+            "vars": {"first": {"$arrayElemAt": [{"$cond": [{"$isArray": "$media"}, "$media", []]}, 0]}},
+            "in": {
+                "$ifNull": [
+                    _hosted_url("$image_thumbnail"),
+                    {"$ifNull": [
+                        _hosted_url("$image"),
+                        {"$ifNull": [_hosted_url("$$first.thumbnail"), _hosted_url("$$first.url")]},
+                    ]},
+                ]
+            },
+        }
+    },
+    "media_count": {"$size": {"$cond": [{"$isArray": "$media"}, "$media", []]}},
+}
+USER_POSTS_DEFAULT_LIMIT = 20
+USER_POSTS_MAX_LIMIT = 100
+# A month grid with leading/trailing days spans at most six weeks
+CALENDAR_MAX_DAYS = 42
+CALENDAR_MAX_POSTS = 2000
+
+
+def _encode_post_cursor(post: dict) -> str:
+    """Opaque keyset cursor for (created_at, _id) - milliseconds since epoch, as Mongo stores them"""
+    created_at = post.get("created_at")
+    if created_at is None:
+        created_ms = "-"
+    else:
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        created_ms = str((created_at - datetime(1970, 1, 1)) // timedelta(milliseconds=1))
+    raw = f"{created_ms}:{post['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+
+def _decode_post_cursor(cursor: str) -> dict:
+    """Filter matching posts that sort after the cursor in (created_at desc, _id desc) order"""
+    try:
+        created_ms, post_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+        last_id = ObjectId(post_id)
+        created_at = None if created_ms == "-" else datetime(1970, 1, 1) + timedelta(milliseconds=int(created_ms))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if created_at is None:
+        # Posts without created_at sort last; only the _id tie-break remains
+        return {"created_at": None, "_id": {"$lt": last_id}}
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+            {"created_at": None},
+        ]
+    }
+
+
+def _post_filters(status: str | None, platform: str | None) -> List[dict]:
+    """Match clauses for the optional status (comma-separated) and platform query params"""
+    clauses = []
+    if status:
+        statuses = [value.strip() for value in status.split(",") if value.strip()]
+        if "draft" in statuses:
+            # Older posts were saved without a status; they are drafts
+            clauses.append({"$or": [{"status": {"$in": statuses}}, {"status": None}]})
+        else:
+            clauses.append({"status": {"$in": statuses}})
+    if platform:
+        clauses.append({"platforms": platform.strip().lower()})
+    return clauses
+
+
 @router.get("/user-posts")
-async def get_user_posts(user: dict = Depends(get_current_user)):
-    """Get all posts created by the user"""
+async def get_user_posts(
+    limit: int = Query(default=USER_POSTS_DEFAULT_LIMIT, ge=1, le=USER_POSTS_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
+    status: str | None = Query(default=None),
+    platform: str | None = Query(default=None),
+    user: dict = Depends(get_current_user),
+):
+    """
+    List the user's posts newest first, one page at a time.
+    Returns summaries (no inline image/media payloads) and a `next_cursor`
+    to pass back for the following page; GET /posts/{post_id} has the full post.
+    """
     # Normalize user id to string (dependencies already returns string id)
     user_id = str(user["_id"])
 
-    # Support both field names (`created_by` from posts.create and `user_id` from content.save)
-    query = {"$or": [{"created_by": user_id}, {"user_id": user_id}]}
+    clauses = [owner_query(user_id), *_post_filters(status, platform)]
+    if cursor:
+        clauses.append(_decode_post_cursor(cursor))
+
+    # Fetch one extra row to know whether another page exists
+    posts = list(posts_collection.aggregate([
+        {"$match": {"$and": clauses}},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": POST_SUMMARY_PROJECTION},
+    ]))
+    has_next = len(posts) > limit
+    posts = posts[:limit]
+    next_cursor = _encode_post_cursor(posts[-1]) if has_next else None
+
+    return {
+        "status": "success",
+        "posts": [_serialize_post(p) for p in posts],
+        "pagination": {"limit": limit, "next_cursor": next_cursor, "has_next": has_next},
+    }
+
+
+@router.get("/search")
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=USER_POSTS_DEFAULT_LIMIT, ge=1, le=USER_POSTS_MAX_LIMIT),
+    status: str | None = Query(default=None),
+    platform: str | None = Query(default=None),
+    user: dict = Depends(get_current_user),
+):
+    """
+    Full-text search over the user's post captions, topics and hashtags,
+    most relevant first. Served by the (owner_id, text) index, so only the
+    user's matching posts are read.
+    """
+    # The text index is prefixed by owner_id, which requires an equality match on it
+    # (posts not yet backfilled with owner_id are not searchable until the migration runs)
+    match = {"$text": {"$search": q}, "owner_id": str(user["_id"])}
+    clauses = _post_filters(status, platform)
+    if clauses:
+        match["$and"] = clauses
+
+    skip = (page - 1) * limit
+    posts = list(posts_collection.aggregate([
+        {"$match": match},
+        {"$sort": {"score": {"$meta": "textScore"}, "created_at": -1, "_id": -1}},
+        {"$skip": skip},
+        {"$limit": limit + 1},
+        {"$project": {**POST_SUMMARY_PROJECTION, "score": {"$meta": "textScore"}}},
+    ]))
+    has_next = len(posts) > limit
+    posts = posts[:limit]
+
+    return {
+        "status": "success",
+        "posts": [_serialize_post(p) for p in posts],
+        "pagination": {"page": page, "limit": limit, "has_next": has_next},
+    }
+
 
-    posts = list(posts_collection.find(query).sort("created_at", -1))
+def _calendar_window(view: str, anchor: datetime) -> tuple:
+    """[start, end) of the week (Monday first) or month containing anchor, in Pakistan time"""
+    day = _to_pakistan_time(anchor).date()
+    if view == "week":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=7)
+    else:
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    return (
+        PAKISTAN_TZ.localize(datetime(start.year, start.month, start.day)),
+        PAKISTAN_TZ.localize(datetime(end.year, end.month, end.day)),
+    )
+
+
+@router.get("/calendar")
+async def get_post_calendar(
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = Query(default=None),
+    view: str = Query(default="month", pattern="^(week|month)$"),
+    date: datetime | None = Query(default=None),
+    user: dict = Depends(get_current_user),
+):
+    """
+    Posts to show on a content calendar: scheduled posts by scheduled_at and
+    published posts by published_at, within [from, to). Without from/to,
+    returns the week or month (`view`) containing `date` (default: today).
+    Each item carries only id, platforms, status, time and thumbnail; at most
+    CALENDAR_MAX_POSTS are returned, with `truncated` set when there were more.
+    """
+    if from_ is None or to is None:
+        if from_ is not None or to is not None:
+            raise HTTPException(status_code=400, detail="Provide both from and to, or neither")
+        start, end = _calendar_window(view, date or datetime.now(PAKISTAN_TZ))
+    else:
+        start, end = _to_pakistan_time(from_), _to_pakistan_time(to)
+        if end <= start:
+            raise HTTPException(status_code=400, detail="to must be after from")
+        if end - start > timedelta(days=CALENDAR_MAX_DAYS):
+            raise HTTPException(status_code=400, detail=f"Calendar range cannot exceed {CALENDAR_MAX_DAYS} days")
+
+    owner = owner_query(str(user["_id"]))
+    posts = list(posts_collection.aggregate([
+        # One index range scan per branch: (owner_id, scheduled_at) and (owner_id, published_at)
+        {"$match": {"$or": [
+            {**owner, "scheduled_at": {"$gte": start, "$lt": end}, "status": {"$in": ["scheduled", "publishing"]}},
+            {**owner, "published_at": {"$gte": start, "$lt": end}, "status": "published"},
+        ]}},
+        {"$project": {
+            "_id": 1,
+            "platforms": 1,
+            "status": 1,
+            "time": {"$cond": [{"$eq": ["$status", "published"]}, "$published_at", "$scheduled_at"]},
+            "thumbnail": POST_SUMMARY_PROJECTION["thumbnail"],
+        }},
+        {"$sort": {"time": 1, "_id": 1}},
+        # One extra row tells whether the range held more posts than are returned
+        {"$limit": CALENDAR_MAX_POSTS + 1},
+    ]))
+    truncated = len(posts) > CALENDAR_MAX_POSTS
+    posts = posts[:CALENDAR_MAX_POSTS]
 
-    # Convert ObjectId and datetimes to serializable values
     for p in posts:
         p["_id"] = str(p["_id"])
-        if "created_at" in p and hasattr(p["created_at"], "isoformat"):
-            p["created_at"] = _serialize_to_pakistan_time(p["created_at"])
-        if "scheduled_at" in p and hasattr(p["scheduled_at"], "isoformat"):
-            p["scheduled_at"] = _serialize_to_pakistan_time(p["scheduled_at"])
-        if "published_at" in p and hasattr(p["published_at"], "isoformat"):
-            p["published_at"] = _serialize_to_pakistan_time(p["published_at"])
-            
-    return {"status": "success", "posts": posts}
+        if hasattr(p.get("time"), "isoformat"):
+            p["time"] = _serialize_to_pakistan_time(p["time"])
+
+    return {
+        "status": "success",
+        "range": {"from": start.isoformat(), "to": end.isoformat()},
+        "posts": posts,
+        "truncated": truncated,
+    }
 
 
 @router.get("/stats")
 async def get_post_stats(user: dict = Depends(get_current_user)):
     """Get post statistics for the dashboard"""
-    user_id = str(user["_id"])
-    total = posts_collection.count_documents({"user_id": user_id})
-    drafts = posts_collection.count_documents({"user_id": user_id, "status": "draft"})
-    scheduled = posts_collection.count_documents({"user_id": user_id, "status": "scheduled"})
-    published = posts_collection.count_documents({"user_id": user_id, "status": "published"})
-    return {"status": "success", "stats": {"total_posts": total, "drafts": drafts, "scheduled": scheduled, "published": published}}
+    return {"status": "success", "stats": load_post_stats(user["_id"])}
 
 
 @router.get("/status/{job_id}")
@@ -400,7 +643,10 @@ def _execute_publish_worker(job_id: str, payload_dict: dict, user: dict):
                     final_media.append({
                         "url": media_url,
                         "type": media_type,
-                        "order": media_item.get("order", 0) if isinstance(media_item, dict) else 0
+                        "order": media_item.get("order", 0) if isinstance(media_item, dict) else 0,
+                        # Dimensions recorded at upload let validation skip downloads
+                        "width": media_item.get("width") if isinstance(media_item, dict) else None,
+                        "height": media_item.get("height") if isinstance(media_item, dict) else None,
                     })
                 
                 if not results.get("instagram"):
@@ -418,12 +664,32 @@ def _execute_publish_worker(job_id: str, payload_dict: dict, user: dict):
                         job_tracker.update_job(job_id, message="Validating media aspect ratios...")
                         validation = validate_carousel_aspect_ratios(final_media)
                         
+                        carousel_media = final_media
+                        normalized = {}
+                        
                         if not validation.get("valid"):
-                            # Aspect ratios don't match - provide detailed error
+                            # Aspect ratios don't match - crop/pad items to a common ratio
                             error_msg = format_aspect_ratio_error(validation)
                             logger.warning(f"Instagram carousel aspect ratio validation failed: {error_msg}")
+                            job_tracker.update_job(
+                                job_id,
+                                message="Aspect ratios don't match. Normalizing carousel media..."
+                            )
+                            normalized = normalize_carousel_media(final_media)
+                            carousel_media = normalized.get("media")
+                        
+                        if carousel_media:
+                            job_tracker.update_job(job_id, message=f"Creating Instagram carousel with {len(carousel_media)} items...")
+                            results["instagram"] = insta_service.publish_carousel(carousel_media, caption_text)
                             
-                            # Use fallback: publish first item only with warning
+                            if results["instagram"].get("status") == "success" and normalized.get("normalized"):
+                                results["instagram"]["warning"] = (
+                                    f"{normalized['normalized']} item(s) were cropped or padded to a "
+                                    f"{normalized['ratio']}:1 aspect ratio to match the carousel."
+                                )
+                        else:
+                            # Normalization failed - fall back to publishing the first item only
+                            logger.warning(f"Carousel normalization failed: {normalized.get('detail')}")
                             job_tracker.update_job(
                                 job_id, 
                                 message="⚠️ Aspect ratios don't match. Publishing first item only..."
@@ -440,10 +706,6 @@ def _execute_publish_worker(job_id: str, payload_dict: dict, user: dict):
                                 results["instagram"]["warning"] = (
                                     f"Only first item published. {validation.get('message', 'Aspect ratios must match for carousels.')}"
                                 )
-                        else:
-                            # Validation passed - proceed with carousel
-                            job_tracker.update_job(job_id, message=f"Creating Instagram carousel with {len(final_media)} items...")
-                            results["instagram"] = insta_service.publish_carousel(final_media, caption_text)
 
                 # Update platform status based on actual result
                 ig_result = results.get("instagram", {})
@@ -471,7 +733,13 @@ def _execute_publish_worker(job_id: str, payload_dict: dict, user: dict):
                 "published_at": datetime.now(PAKISTAN_TZ) if any_success else None,
                 "platform_results": results,
             }
-            posts_collection.update_one({"_id": post_doc["_id"]}, {"$set": update})
+            previous = posts_collection.find_one_and_update(
+                {"_id": post_doc["_id"]},
+                {"$set": update},
+                projection={**OWNER_PROJECTION, "status": 1},
+            )
+            if previous:
+                record_post_status_change(owner_of(previous), previous.get("status"), update["status"])
 
         failed_platforms = [
             p for p in platforms 
@@ -550,6 +818,23 @@ async def publish_post(payload: PublishRequest, user: dict = Depends(get_current
     }
 
 
+@router.get("/{post_id}")
+async def get_post(post_id: str, user: dict = Depends(get_current_user)):
+    """Get one post with its full image and media payloads"""
+    try:
+        post = posts_collection.find_one({"_id": ObjectId(post_id)})
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid post_id")
+
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    if owner_of(post) != str(user["_id"]):
+        raise HTTPException(status_code=403, detail="Not allowed to view this post")
+
+    return {"status": "success", "post": _serialize_post(post)}
+
+
 @router.patch("/{post_id}/schedule")
 async def reschedule_post(
     post_id: str,
@@ -558,7 +843,7 @@ async def reschedule_post(
 ):
     """Reschedule or cancel a scheduled post"""
     try:
-        post_doc = posts_collection.find_one({"_id": ObjectId(post_id)})
+        post_doc = posts_collection.find_one({"_id": ObjectId(post_id)}, {**OWNER_PROJECTION, "status": 1})
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid post_id")
 
@@ -566,9 +851,11 @@ async def reschedule_post(
         raise HTTPException(status_code=404, detail="Post not found")
 
     user_id = str(user["_id"])
-    owner_id = str(post_doc.get("created_by") or post_doc.get("user_id"))
+    owner_id = owner_of(post_doc)
     if owner_id != user_id:
         raise HTTPException(status_code=403, detail="Not allowed to modify this post")
+    if post_doc.get("status") == "publishing":
+        raise HTTPException(status_code=409, detail="Post is being published and cannot be rescheduled")
 
     update = {}
     
@@ -597,7 +884,20 @@ async def reschedule_post(
     if payload.platforms is not None:
         update["platforms"] = payload.platforms
     
-    posts_collection.update_one({"_id": ObjectId(post_id)}, {"$set": update})
+    # The scheduler may have claimed the post since it was read; the
+    # pre-update document gives the status the stats counters must move from
+    previous = posts_collection.find_one_and_update(
+        {"_id": ObjectId(post_id), "status": {"$ne": "publishing"}},
+        {"$set": update},
+        projection={"status": 1},
+    )
+    if previous is None:
+        raise HTTPException(status_code=409, detail="Post is being published and cannot be rescheduled")
+    record_post_status_change(owner_id, previous.get("status"), update["status"])
+    if update["status"] == "scheduled":
+        notify_post_scheduled(post_id, update["scheduled_at"])
+    else:
+        notify_post_unscheduled(post_id)
     
     return {"status": "success", "message": message}
 
@@ -611,13 +911,13 @@ async def edit_post(
     """Edit a post's caption, hashtags, or image"""
     try:
         # Find the post
-        post = posts_collection.find_one({"_id": ObjectId(post_id)})
+        post = posts_collection.find_one({"_id": ObjectId(post_id)}, OWNER_PROJECTION)
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
         
         # Verify ownership
         user_id = current_user.get("user_id") or current_user.get("_id")
-        post_owner = post.get("created_by") or post.get("user_id")
+        post_owner = owner_of(post)
         
         if str(user_id) != str(post_owner):
             raise HTTPException(status_code=403, detail="Not authorized to edit this post")
@@ -633,6 +933,11 @@ async def edit_post(
         
         if not update:
             raise HTTPException(status_code=400, detail="No fields to update")
+        update.update(offload_post_media(update, str(user_id)))
+        if "image" in update and "image_thumbnail" not in update:
+            # Replaced by a hosted URL (or an upload that failed): drop the old image's references
+            update["image_thumbnail"] = thumbnail_url(update["image"])
+            update["image_public_id"] = None
         
         # Update the post
         posts_collection.update_one({"_id": ObjectId(post_id)}, {"$set": update})
@@ -653,22 +958,29 @@ async def delete_post(
     """Delete a post"""
     try:
         # Find the post
-        post = posts_collection.find_one({"_id": ObjectId(post_id)})
+        post = posts_collection.find_one({"_id": ObjectId(post_id)}, {**OWNER_PROJECTION, "status": 1})
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
         
         # Verify ownership
         user_id = current_user.get("user_id") or current_user.get("_id")
-        post_owner = post.get("created_by") or post.get("user_id")
+        post_owner = owner_of(post)
         
         if str(user_id) != str(post_owner):
             raise HTTPException(status_code=403, detail="Not authorized to delete this post")
+        if post.get("status") == "publishing":
+            raise HTTPException(status_code=409, detail="Post is being published and cannot be deleted")
         
-        # Delete the post
-        result = posts_collection.delete_one({"_id": ObjectId(post_id)})
+        # Delete the post unless the scheduler claimed it since it was read
+        deleted = posts_collection.find_one_and_delete(
+            {"_id": ObjectId(post_id), "status": {"$ne": "publishing"}},
+            projection={"status": 1},
+        )
         
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Post not found")
+        if deleted is None:
+            raise HTTPException(status_code=409, detail="Post is being published and cannot be deleted")
+        record_post_deleted(post_owner, deleted.get("status"))
+        notify_post_unscheduled(post_id)
         
         return {"status": "success", "message": "Post deleted successfully"}
     
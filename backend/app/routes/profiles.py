@@ -1,6 +1,6 @@
 from bson import ObjectId
 from fastapi import APIRouter, Depends
-from app.services.dependencies import get_current_user
+from app.services.dependencies import get_current_user, invalidate_user_principal
 from app.models import UserProfileData
 from app.services.database import users_collection
 
@@ -16,6 +16,7 @@ def create_profile(profile: UserProfileData, user: dict = Depends(get_current_us
             "interests": profile.interests
         }}
     )
+    invalidate_user_principal(user["_id"])
     return {"message": "Profile created/updated successfully"}
 
 
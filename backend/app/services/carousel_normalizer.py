@@ -0,0 +1,139 @@
+"""
+Carousel media normalization.
+Brings every carousel item to one aspect ratio (center-crop or pad) so an
+Instagram carousel can publish in a single pass instead of degrading to its
+first item. Cloudinary-hosted media is transformed through delivery URLs;
+other images are re-encoded with Pillow in a process pool and re-hosted.
+"""
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from PIL import Image, ImageOps
+
+from app.config import config
+from app.services.cloudinary_service import CloudinaryService
+from app.services.media_validator import get_aspect_ratio, resolve_media_dimensions
+
+logger = logging.getLogger(__name__)
+
+# Instagram feed/carousel ratio limits (4:5 portrait to 1.91:1 landscape)
+MIN_CAROUSEL_RATIO = 0.8
+MAX_CAROUSEL_RATIO = 1.91
+RATIO_TOLERANCE = 0.02
+# Instagram displays at most 1080px wide; larger re-encodes only cost CPU
+MAX_OUTPUT_WIDTH = 1080
+PAD_COLOR = (255, 255, 255)
+NORMALIZE_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Lazily start the shared image worker pool (spawned, so no forked threads/sockets)"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=NORMALIZE_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def _target_size(width: int, height: int, ratio: float, mode: str) -> Tuple[int, int]:
+    """Output size after cropping into (or padding out to) the target ratio"""
+    source_ratio = get_aspect_ratio(width, height)
+    shrink_width = source_ratio > ratio
+    if mode == "pad":
+        shrink_width = not shrink_width
+    if shrink_width:
+        return round(height * ratio), height
+    return width, round(width / ratio)
+
+
+def _cloudinary_transform_url(url: str, ratio: float, mode: str) -> Optional[str]:
+    """Insert a crop/pad transformation into a Cloudinary delivery URL"""
+    if "res.cloudinary.com" not in url or "/upload/" not in url:
+        return None
+    if mode == "pad":
+        transformation = f"c_pad,ar_{ratio:.4f},b_white"
+    else:
+        transformation = f"c_fill,ar_{ratio:.4f},g_center"
+    return url.replace("/upload/", f"/upload/{transformation}/", 1)
+
+
+def _normalize_image_bytes(url: str, ratio: float, mode: str) -> bytes:
+    """
+    Process-pool worker: download an image, crop/pad it to `ratio` and return JPEG bytes.
+    draft() lets JPEGs decode at a reduced scale when the source is far above output size.
+    """
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    with Image.open(io.BytesIO(response.content)) as img:
+        output_width = min(img.width, MAX_OUTPUT_WIDTH)
+        output_size = (output_width, round(output_width / ratio))
+        img.draft("RGB", output_size)
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        if mode == "pad":
+            result = ImageOps.pad(img, output_size, color=PAD_COLOR, centering=(0.5, 0.5))
+        else:
+            result = ImageOps.fit(img, output_size, method=Image.LANCZOS, centering=(0.5, 0.5))
+    buffer = io.BytesIO()
+    result.save(buffer, format="JPEG", quality=90, optimize=True)
+    return buffer.getvalue()
+
+
+def normalize_carousel_media(media_items: List[Dict], mode: Optional[str] = None) -> Dict:
+    """
+    Normalize carousel items to the first item's aspect ratio (clamped to
+    Instagram's limits). Items already within tolerance are left untouched.
+
+    Returns {"status": "success", "media": [...], "ratio": r, "normalized": n}
+    or {"status": "error", "detail": "..."} if an item cannot be normalized.
+    """
+    mode = mode or config.CAROUSEL_NORMALIZE_MODE
+    dimensions = resolve_media_dimensions(media_items)
+    if not dimensions or not dimensions[0]:
+        return {"status": "error", "detail": "Could not determine the first item's dimensions"}
+
+    first_ratio = get_aspect_ratio(*dimensions[0])
+    ratio = min(max(first_ratio, MIN_CAROUSEL_RATIO), MAX_CAROUSEL_RATIO)
+
+    normalized_media = [dict(item) for item in media_items]
+    pending = {}  # index -> future for images re-encoded locally
+    for idx, (item, dims) in enumerate(zip(normalized_media, dimensions)):
+        if not dims:
+            return {"status": "error", "detail": f"Could not determine dimensions for item {idx + 1}"}
+        if abs(get_aspect_ratio(*dims) - ratio) <= RATIO_TOLERANCE:
+            continue
+
+        transformed_url = _cloudinary_transform_url(item["url"], ratio, mode)
+        if transformed_url:
+            item["url"] = transformed_url
+            item["width"], item["height"] = _target_size(dims[0], dims[1], ratio, mode)
+        elif item.get("type", "image") == "image":
+            pending[idx] = _get_process_pool().submit(_normalize_image_bytes, item["url"], ratio, mode)
+        else:
+            return {"status": "error", "detail": f"Video item {idx + 1} is not hosted on Cloudinary and cannot be reframed"}
+
+    for idx, future in pending.items():
+        try:
+            image_bytes = future.result(timeout=120)
+        except Exception as e:
+            logger.error(f"Failed to normalize carousel item {idx + 1}: {e}")
+            return {"status": "error", "detail": f"Failed to normalize item {idx + 1}: {e}"}
+        upload = CloudinaryService.upload_image_stream(io.BytesIO(image_bytes), folder="posts/normalized")
+        if upload.get("status") != "success":
+            return {"status": "error", "detail": f"Failed to upload normalized item {idx + 1}: {upload.get('detail')}"}
+        normalized_media[idx].update({"url": upload["url"], "width": upload["width"], "height": upload["height"]})
+
+    changed = sum(1 for before, after in zip(media_items, normalized_media) if before["url"] != after["url"])
+    logger.info(f"Normalized {changed}/{len(media_items)} carousel items to ratio {ratio:.3f} ({mode})")
+    return {"status": "success", "media": normalized_media, "ratio": round(ratio, 3), "normalized": changed}
@@ -5,7 +5,7 @@ import base64
 import io
 import logging
 from app.config import config
-from typing import Optional, Dict, List
+from typing import BinaryIO, Optional, Dict, List
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
@@ -17,6 +17,9 @@ cloudinary.config(
     api_secret=config.CLOUDINARY_API_SECRET
 )
 
+# Chunk size for Cloudinary chunked (upload_large) uploads
+UPLOAD_CHUNK_SIZE = 20 * 1024 * 1024  # 20MB
+
 
 class CloudinaryService:
     """Cloudinary service for uploading and managing images and videos"""
@@ -93,29 +96,94 @@ class CloudinaryService:
                     max_bytes=500000000,  # 500MB max
                 )
             
-            # Get video metadata
-            duration = result.get("duration")
-            width = result.get("width")
-            height = result.get("height")
+            return CloudinaryService._video_result(result)
+        except Exception as e:
+            logger.error(f"Error uploading video to Cloudinary: {str(e)}")
+            return {"status": "error", "detail": str(e)}
+    
+    @staticmethod
+    def _video_result(result: Dict) -> Dict:
+        """Build the upload response (metadata + thumbnail) for an uploaded video"""
+        # Get video metadata
+        duration = result.get("duration")
+        width = result.get("width")
+        height = result.get("height")
+        
+        # Generate thumbnail
+        thumbnail_url = cloudinary.utils.cloudinary_url(
+            result.get("public_id"),
+            resource_type="video",
+            format="jpg",
+            secure=True
+        )[0]
+        
+        logger.info(f"Video uploaded to Cloudinary: {result.get('public_id')} (duration: {duration}s)")
+        return {
+            "status": "success",
+            "url": result.get("secure_url"),
+            "public_id": result.get("public_id"),
+            "duration": duration,
+            "width": width,
+            "height": height,
+            "format": result.get("format"),
+            "thumbnail": thumbnail_url
+        }
+    
+    @staticmethod
+    def upload_image_stream(file_obj: BinaryIO, folder: str = "posts/images") -> Dict:
+        """
+        Upload an image from an open binary file object (no base64 round-trip)
+        
+        Args:
+            file_obj: Readable binary file object positioned at the start
+            folder: Cloudinary folder path
             
-            # Generate thumbnail
-            thumbnail_url = cloudinary.utils.cloudinary_url(
-                result.get("public_id"),
-                resource_type="video",
-                format="jpg",
-                secure=True
-            )[0]
+        Returns:
+            {"status": "success", "url": "...", "public_id": "...", "width": w, "height": h, "format": "..."}
+        """
+        try:
+            result = cloudinary.uploader.upload(
+                file_obj,
+                folder=folder,
+                resource_type="image",
+                quality="auto"
+            )
             
-            logger.info(f"Video uploaded to Cloudinary: {result.get('public_id')} (duration: {duration}s)")
+            logger.info(f"Image uploaded to Cloudinary: {result.get('public_id')}")
             return {
                 "status": "success",
                 "url": result.get("secure_url"),
                 "public_id": result.get("public_id"),
-                "duration": duration,
-                "width": width,
-                "height": height,
-                "thumbnail": thumbnail_url
+                "width": result.get("width"),
+                "height": result.get("height"),
+                "format": result.get("format"),
             }
+        except Exception as e:
+            logger.error(f"Error uploading image to Cloudinary: {str(e)}")
+            return {"status": "error", "detail": str(e)}
+    
+    @staticmethod
+    def upload_video_stream(file_obj: BinaryIO, folder: str = "posts/videos") -> Dict:
+        """
+        Upload a video from an open binary file object using Cloudinary's
+        chunked upload API, so only one chunk is in memory at a time
+        
+        Args:
+            file_obj: Readable binary file object positioned at the start
+            folder: Cloudinary folder path
+            
+        Returns:
+            {"status": "success", "url": "...", "public_id": "...", "duration": duration, "thumbnail": "..."}
+        """
+        try:
+            result = cloudinary.uploader.upload_large(
+                file_obj,
+                resource_type="video",
+                folder=folder,
+                chunk_size=UPLOAD_CHUNK_SIZE,
+                max_bytes=500000000,  # 500MB max
+            )
+            return CloudinaryService._video_result(result)
         except Exception as e:
             logger.error(f"Error uploading video to Cloudinary: {str(e)}")
             return {"status": "error", "detail": str(e)}
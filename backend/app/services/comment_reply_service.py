@@ -3,7 +3,7 @@ from typing import Dict, Any, List
 from datetime import datetime
 import google.generativeai as genai
 from app.config.config import GEMINI_API_KEY
-from app.services.database import db
+from app.services.database import linkedin_settings_collection, linkedin_comments_collection
 
 logger = logging.getLogger(__name__)
 
@@ -11,10 +11,6 @@ logger = logging.getLogger(__name__)
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
-# MongoDB collections
-linkedin_settings_collection = db["linkedin_settings"]
-linkedin_comments_collection = db["linkedin_comments"]
-
 
 class CommentReplyService:
     """Service for AI-powered comment auto-replies on LinkedIn posts"""
@@ -2,6 +2,7 @@ from pymongo import MongoClient
 import os
 import certifi
 from dotenv import load_dotenv
+from app.services.index_registry import ensure_indexes
 
 load_dotenv()
 
@@ -35,55 +36,24 @@ automation_actions_collection = db["automation_actions"]
 dm_threads_collection = db["dm_threads"]
 poll_cursor_state_collection = db["poll_cursor_state"]
 
+# Content-addressed media registry (sha256 -> Cloudinary asset + metadata)
+media_assets_collection = db["media_assets"]
+
+# LinkedIn comment automation and analytics sync
+linkedin_settings_collection = db["linkedin_settings"]
+linkedin_comments_collection = db["linkedin_comments"]
+linkedin_posts_collection = db["linkedin_posts"]
+
+# Per-user post counts by status, maintained incrementally (see services/post_stats.py)
+post_stats_collection = db["post_stats"]
+
+# Short-lived shared state (rate-limit windows, OAuth states), expired by a TTL index
+ephemeral_state_collection = db["ephemeral_state"]
+
+# Completed one-off data migrations
+migrations_collection = db["migrations"]
+
+
 def init_automation_indexes():
-    """Initialize indexes for automation collections - call on app startup"""
-    feedback_collection.create_index(
-        [("created_by_user_id", 1), ("created_at", -1)]
-    )
-    feedback_collection.create_index(
-        [("feature_key", 1), ("created_at", -1)]
-    )
-    feedback_collection.create_index(
-        [("rating", 1)]
-    )
-    
-    # automation_settings: user + platform should be unique
-    automation_settings_collection.create_index(
-        [("user_id", 1), ("platform", 1)],
-        unique=True
-    )
-    
-    # automation_events: query by user, platform, created_at for polling
-    automation_events_collection.create_index(
-        [("user_id", 1), ("platform", 1), ("created_at", -1)]
-    )
-    automation_events_collection.create_index(
-        [("user_id", 1), ("event_type", 1)],
-    )
-    
-    # automation_actions: query by idempotency_key (deduplication), user + status for retry
-    automation_actions_collection.create_index(
-        [("idempotency_key", 1), ("user_id", 1)],
-        unique=True
-    )
-    automation_actions_collection.create_index(
-        [("user_id", 1), ("status", 1)]
-    )
-    automation_actions_collection.create_index(
-        [("next_retry_at", 1)],
-    )
-    
-    # dm_threads: query by user + platform + conversation_id (update state)
-    dm_threads_collection.create_index(
-        [("user_id", 1), ("platform", 1), ("conversation_id", 1)],
-        unique=True
-    )
-    dm_threads_collection.create_index(
-        [("is_paused_by_human", 1)],
-    )
-    
-    # poll_cursor_state: key state by (user, platform, channel_type)
-    poll_cursor_state_collection.create_index(
-        [("user_id", 1), ("platform", 1), ("channel_type", 1)],
-        unique=True
-    )
\ No newline at end of file
+    """Create any missing indexes declared in the index registry - call on app startup"""
+    ensure_indexes(db)
@@ -1,3 +1,7 @@
+import time
+from collections import OrderedDict
+from datetime import timezone
+from threading import Lock
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
@@ -7,6 +11,87 @@ from app.services.database import users_collection
 
 security = HTTPBearer()
 
+# Fields request handlers need from the authenticated user. Secrets (password
+# hash, reset token state, social account tokens) are never loaded here.
+PRINCIPAL_PROJECTION = {
+    "email": 1,
+    "username": 1,
+    "name": 1,
+    "role": 1,
+    "created_at": 1,
+    "password_changed_at": 1,
+}
+# Bounded per-process principal cache keyed by (token sub, token iat). Local
+# writes invalidate immediately; other workers pick up changes within the TTL.
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_ENTRIES = 5000
+
+_principal_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_principal_keys_by_user: dict = {}
+_principal_cache_lock = Lock()
+
+
+def _drop_principal(key: tuple) -> None:
+    """Remove one cache entry and its user index entry (caller holds the lock)"""
+    entry = _principal_cache.pop(key, None)
+    if entry is None:
+        return
+    user_id = entry[1]["_id"]
+    keys = _principal_keys_by_user.get(user_id)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _principal_keys_by_user[user_id]
+
+
+def _cache_principal(key: tuple, user: dict) -> None:
+    with _principal_cache_lock:
+        _drop_principal(key)
+        _principal_cache[key] = (time.monotonic() + PRINCIPAL_CACHE_TTL_SECONDS, user)
+        _principal_keys_by_user.setdefault(user["_id"], set()).add(key)
+        while len(_principal_cache) > PRINCIPAL_CACHE_MAX_ENTRIES:
+            _drop_principal(next(iter(_principal_cache)))
+
+
+def _cached_principal(key: tuple) -> dict | None:
+    with _principal_cache_lock:
+        entry = _principal_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            _drop_principal(key)
+            return None
+        _principal_cache.move_to_end(key)
+        return entry[1]
+
+
+def invalidate_user_principal(user_id) -> None:
+    """Forget cached principals for a user after profile, password or account changes"""
+    with _principal_cache_lock:
+        for key in list(_principal_keys_by_user.get(str(user_id), ())):
+            _drop_principal(key)
+
+
+def _load_principal(sub: str) -> dict | None:
+    # Try ObjectId first, fallback to email
+    try:
+        user = users_collection.find_one({"_id": ObjectId(sub)}, PRINCIPAL_PROJECTION)
+    except Exception:
+        user = users_collection.find_one({"email_lower": sub.strip().lower()}, PRINCIPAL_PROJECTION)
+    if user:
+        user["_id"] = str(user["_id"])
+    return user
+
+
+def _issued_before_password_change(user: dict, issued_at) -> bool:
+    changed_at = user.get("password_changed_at")
+    if not changed_at or issued_at is None:
+        return False
+    if changed_at.tzinfo is None:
+        changed_at = changed_at.replace(tzinfo=timezone.utc)
+    return int(issued_at) < int(changed_at.timestamp())
+
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
@@ -15,18 +100,18 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         if sub is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-        # Try ObjectId first, fallback to email
-        user = None
-        try:
-            user = users_collection.find_one({"_id": ObjectId(sub)})
-        except Exception:
-            user = users_collection.find_one({"email": sub})
+        cache_key = (sub, payload.get("iat"))
+        user = _cached_principal(cache_key)
+        if user is None:
+            user = _load_principal(sub)
+            if not user:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+            if _issued_before_password_change(user, payload.get("iat")):
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired or invalid")
+            _cache_principal(cache_key, user)
 
-        if not user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-
-        user["_id"] = str(user["_id"])
-        return user
+        # Handlers receive their own copy so request-local changes never leak into the cache
+        return dict(user)
 
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired or invalid")
@@ -36,4 +121,4 @@ def get_current_admin_user(credentials: HTTPAuthorizationCredentials = Depends(s
     user = get_current_user(credentials)
     if str(user.get("role") or "user").lower() != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,140 @@
+"""
+Ephemeral key-value state with expiry (rate-limit counters, OAuth states).
+Two interchangeable backends, selected with EPHEMERAL_STORE_BACKEND:
+
+- "memory": bounded in-process LRU, for a single worker
+- "mongo": TTL collection shared by every worker
+
+Both offer atomic increment-with-expiry (fixed-window counters) and
+take-once reads (a value can be consumed by exactly one caller).
+"""
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import config
+from app.services.database import ephemeral_state_collection
+
+logger = logging.getLogger(__name__)
+
+MEMORY_STORE_MAX_ENTRIES = 100000
+
+
+class InMemoryEphemeralStore:
+    """Process-local store; least recently used keys are evicted beyond max_entries"""
+
+    def __init__(self, max_entries: int = MEMORY_STORE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = Lock()
+
+    def _live_entry(self, key: str) -> Optional[tuple]:
+        """Return the unexpired entry for key (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, expires_at: float, value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._store(key, time.monotonic() + ttl_seconds, value)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._live_entry(key)
+            return entry[1] if entry else None
+
+    def take(self, key: str) -> Any:
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return None
+            del self._entries[key]
+            return entry[1]
+
+    def increment(self, key: str, ttl_seconds: float, amount: int = 1) -> int:
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                self._store(key, time.monotonic() + ttl_seconds, amount)
+                return amount
+            count = entry[1] + amount
+            self._store(key, entry[0], count)
+            return count
+
+
+class MongoEphemeralStore:
+    """
+    Shared store on a TTL collection. Mongo's TTL monitor only sweeps about
+    once a minute, so every read also filters on expires_at.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"value": value, "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)}},
+            upsert=True,
+        )
+
+    def get(self, key: str) -> Any:
+        doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}}, {"value": 1})
+        return doc.get("value") if doc else None
+
+    def take(self, key: str) -> Any:
+        doc = self.collection.find_one_and_delete({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return doc.get("value") if doc else None
+
+    def increment(self, key: str, ttl_seconds: float, amount: int = 1) -> int:
+        now = datetime.utcnow()
+        window_open = {"$gt": ["$expires_at", now]}
+        # Pipeline update: add to a live window, or start a new one if missing/expired
+        update = [{"$set": {
+            "value": {"$cond": [window_open, {"$add": ["$value", amount]}, amount]},
+            "expires_at": {"$cond": [window_open, "$expires_at", now + timedelta(seconds=ttl_seconds)]},
+        }}]
+        for _ in range(2):
+            try:
+                doc = self.collection.find_one_and_update(
+                    {"_id": key}, update, upsert=True, return_document=ReturnDocument.AFTER
+                )
+                return doc["value"]
+            except DuplicateKeyError:
+                # Lost the upsert race to a concurrent first increment; retry as an update
+                continue
+        raise RuntimeError(f"Could not increment ephemeral counter {key}")
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_ephemeral_store():
+    """Return the configured store (created on first use)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if config.EPHEMERAL_STORE_BACKEND == "mongo":
+                _store = MongoEphemeralStore(ephemeral_state_collection)
+            else:
+                _store = InMemoryEphemeralStore()
+            logger.info(f"Ephemeral state backend: {type(_store).__name__}")
+        return _store
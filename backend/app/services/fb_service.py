@@ -1,9 +1,13 @@
 import base64
+import logging
 import requests
 import time
 from app.config import config
+from app.services.media_transfer import open_remote_media, skip_bytes
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 
 class FacebookService:
 	def __init__(self, page_id: str | None, access_token: str | None):
@@ -159,9 +163,89 @@ class FacebookService:
 			response = requests.post(url, data=payload, timeout=60).json()
 			
 			if "id" not in response:
-				return {"status": "error", "detail": response}
+				# Facebook could not fetch the URL itself - stream it through a resumable upload
+				logger.warning(f"Facebook file_url video publish failed, falling back to resumable upload: {response}")
+				return self.publish_video_resumable(video_url, caption)
 			
 			return {"status": "success", "data": response}
 		
 		except Exception as e:
-			return {"status": "error", "detail": str(e)}
\ No newline at end of file
+			return {"status": "error", "detail": str(e)}
+
+	def publish_video_resumable(self, video_url: str, caption: str):
+		"""
+		Publish a video with the Graph API resumable upload protocol
+		(start -> transfer chunks -> finish). The video is streamed from its
+		URL and sent in the chunk sizes Facebook requests, so only one chunk
+		is held in memory at a time.
+		"""
+		if not self.page_id or not self.token:
+			return {"status": "error", "detail": "Facebook credentials not configured"}
+		
+		upload_url = f"https://graph-video.facebook.com/{self.api_version}/{self.page_id}/videos"
+		
+		try:
+			source, file_size = open_remote_media(video_url)
+		except Exception as e:
+			return {"status": "error", "detail": f"Failed to download video: {e}"}
+		
+		try:
+			# Phase 1: open an upload session
+			start = requests.post(
+				upload_url,
+				data={"upload_phase": "start", "file_size": file_size, "access_token": self.token},
+				timeout=30,
+			).json()
+			if "upload_session_id" not in start:
+				return {"status": "error", "detail": start}
+			
+			session_id = start["upload_session_id"]
+			start_offset = int(start["start_offset"])
+			end_offset = int(start["end_offset"])
+			position = 0
+			
+			# Phase 2: send the byte ranges Facebook asks for until it has the whole file
+			while start_offset < end_offset:
+				if start_offset < position:
+					return {"status": "error", "detail": "Facebook requested an already-sent chunk; cannot rewind stream"}
+				skip_bytes(source, start_offset - position)
+				chunk = source.read(end_offset - start_offset)
+				position = start_offset + len(chunk)
+				
+				transfer = requests.post(
+					upload_url,
+					data={
+						"upload_phase": "transfer",
+						"upload_session_id": session_id,
+						"start_offset": start_offset,
+						"access_token": self.token,
+					},
+					files={"video_file_chunk": ("chunk", chunk, "application/octet-stream")},
+					timeout=(10, 120),
+				).json()
+				if "start_offset" not in transfer:
+					return {"status": "error", "detail": transfer}
+				
+				start_offset = int(transfer["start_offset"])
+				end_offset = int(transfer["end_offset"])
+			
+			# Phase 3: close the session and publish with the caption
+			finish = requests.post(
+				upload_url,
+				data={
+					"upload_phase": "finish",
+					"upload_session_id": session_id,
+					"description": caption,
+					"access_token": self.token,
+				},
+				timeout=60,
+			).json()
+			if not finish.get("success"):
+				return {"status": "error", "detail": finish}
+			
+			return {"status": "success", "data": {"id": start.get("video_id")}}
+		
+		except Exception as e:
+			return {"status": "error", "detail": str(e)}
+		finally:
+			source.close()
\ No newline at end of file
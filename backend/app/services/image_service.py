@@ -1,61 +1,158 @@
 import base64
+import hashlib
+import tempfile
 import cloudinary
 import cloudinary.uploader
 from app.config import config
+from app.services import media_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Base64 is decoded in slices of this many characters (must be a multiple of 4)
+BASE64_DECODE_CHUNK = 4 * 1024 * 1024
+# Decoded media above this size spills from memory to a temp file
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
 
 class ImageService:
     """Upload images and videos to Cloudinary to get public URLs"""
     
     @staticmethod
-    def upload_base64_to_cloudinary(media_base64: str, media_type: str = "image") -> dict:
+    def upload_base64_to_cloudinary(media_base64: str, media_type: str = "image", owner_id: str = None) -> dict:
         """
         Upload a base64 encoded media to Cloudinary and return public URL
         
         Args:
             media_base64: Base64 encoded media (e.g., "data:image/jpeg;base64,...")
             media_type: "image" or "video"
+            owner_id: Uploading user; assets are only deduplicated within one
+                owner's uploads (no reuse or registration without an owner)
             
         Returns:
-            {"status": "success", "url": "public_url"} or {"status": "error", "detail": "..."}
+            {"status": "success", "url": "public_url", "public_id": "...", "width": w, "height": h, ...}
+            or {"status": "error", "detail": "..."}
         """
         try:
             logger.info(f"Starting Cloudinary {media_type} upload process")
             
-            # Extract base64 data (remove "data:...;base64," prefix)
-            if media_base64.startswith("data:"):
-                media_base64 = media_base64.split(",")[1]
-                logger.info("Extracted base64 data from data URI")
-            
-            logger.info(f"Base64 data length: {len(media_base64)}")
-            
-            # Convert base64 to bytes
-            media_bytes = base64.b64decode(media_base64)
-            
             # Determine resource type (image or video)
             resource_type = "video" if media_type.lower() == "video" else "image"
             
-            # Upload to Cloudinary
-            result = cloudinary.uploader.upload(
-                media_bytes,
-                resource_type=resource_type,
-                folder="agentic_social_manager"
+            # Decode in chunks into a spooled file while hashing the decoded bytes
+            spool, digest, size = ImageService._decode_base64_to_spool(media_base64)
+            logger.info(f"Decoded {size} bytes of {media_type} data")
+            
+            with spool:
+                # Reuse the existing asset if this owner uploaded this exact content before
+                existing = media_registry.find_by_hash(digest, resource_type, owner_id) if owner_id else None
+                if existing:
+                    logger.info(f"Reusing Cloudinary asset for sha256 {digest[:12]}: {existing['url']}")
+                    return {
+                        "status": "success",
+                        "url": existing["url"],
+                        "public_id": existing.get("public_id"),
+                        "width": existing.get("width"),
+                        "height": existing.get("height"),
+                        "duration": existing.get("duration"),
+                        "format": existing.get("format"),
+                        "deduplicated": True,
+                    }
+                
+                fingerprint = {}
+                if resource_type == "image":
+                    fingerprint = media_registry.compute_image_fingerprint(spool)
+                    near_duplicates = (
+                        media_registry.find_near_duplicates(fingerprint.get("phash"), owner_id) if owner_id else []
+                    )
+                    if near_duplicates:
+                        logger.info(
+                            f"Image looks like {len(near_duplicates)} existing asset(s), closest: "
+                            f"{near_duplicates[0]['url']} (distance {near_duplicates[0]['distance']})"
+                        )
+                
+                # Upload to Cloudinary
+                if resource_type == "video":
+                    result = cloudinary.uploader.upload_large(
+                        spool,
+                        resource_type=resource_type,
+                        folder="agentic_social_manager"
+                    )
+                else:
+                    result = cloudinary.uploader.upload(
+                        spool,
+                        resource_type=resource_type,
+                        folder="agentic_social_manager"
+                    )
+            
+            media_registry.register_media(
+                digest,
+                resource_type,
+                result["secure_url"],
+                result.get("public_id"),
+                owner_id=owner_id,
+                bytes=size,
+                width=result.get("width") or fingerprint.get("width"),
+                height=result.get("height") or fingerprint.get("height"),
+                duration=result.get("duration"),
+                format=result.get("format"),
+                mime_type=fingerprint.get("mime_type"),
+                phash=fingerprint.get("phash"),
             )
             
             logger.info(f"Media uploaded successfully to Cloudinary: {result['secure_url']}")
             return {
                 "status": "success",
                 "url": result["secure_url"],
-                "public_id": result.get("public_id")
+                "public_id": result.get("public_id"),
+                "width": result.get("width") or fingerprint.get("width"),
+                "height": result.get("height") or fingerprint.get("height"),
+                "duration": result.get("duration"),
+                "format": result.get("format"),
             }
             
         except Exception as err:
             logger.error(f"Error uploading to Cloudinary: {str(err)}")
             return {"status": "error", "detail": str(err)}
     
+    @staticmethod
+    def _decode_base64_to_spool(media_base64: str):
+        """
+        Decode base64 (optionally a data URI) in fixed-size slices.
+        
+        Returns (spooled_file, sha256_hexdigest, decoded_size). The decoded
+        bytes are never held as a second full copy in memory; the spool
+        spills to disk beyond SPOOL_MAX_MEMORY.
+        """
+        # Skip the "data:...;base64," prefix without copying the payload
+        start = media_base64.index(",") + 1 if media_base64.startswith("data:") else 0
+        
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        hasher = hashlib.sha256()
+        size = 0
+        # Characters left over from the previous slice, so each decode gets a multiple of 4
+        carry = ""
+        try:
+            for offset in range(start, len(media_base64), BASE64_DECODE_CHUNK):
+                # Drop whitespace (MIME-wrapped base64) before aligning to 4-character groups
+                piece = carry + "".join(media_base64[offset:offset + BASE64_DECODE_CHUNK].split())
+                aligned = len(piece) - len(piece) % 4
+                piece, carry = piece[:aligned], piece[aligned:]
+                if not piece:
+                    continue
+                chunk = base64.b64decode(piece, validate=True)
+                hasher.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+            if carry:
+                raise ValueError("Invalid base64 payload: length is not a multiple of 4")
+        except Exception:
+            spool.close()
+            raise
+        
+        spool.seek(0)
+        return spool, hasher.hexdigest(), size
+    
     @staticmethod
     def upload_base64_to_imgbb(image_base64: str) -> dict:
         """
@@ -0,0 +1,313 @@
+"""
+Declarative MongoDB index registry.
+Every index the app relies on is listed in INDEX_REGISTRY, keyed by
+collection name, and the shape of every hot query is listed in
+HOT_QUERIES. The app creates missing indexes at
+startup; the CLI can also diff the live database against the registry,
+drop indexes that are no longer registered, and explain() each hot query
+to fail on collection scans:
+
+    python -m app.services.index_registry diff
+    python -m app.services.index_registry create
+    python -m app.services.index_registry drop [--yes]
+    python -m app.services.index_registry explain --uri mongodb://localhost:27017 --db index_check
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, MongoClient
+
+logger = logging.getLogger(__name__)
+
+
+def index_name(keys: List[tuple]) -> str:
+    """Default MongoDB index name for a key spec, e.g. status_1_scheduled_at_1"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def _index(*keys: tuple, **options) -> Dict:
+    return {"keys": list(keys), "options": options}
+
+
+INDEX_REGISTRY: Dict[str, List[Dict]] = {
+    "users": [
+        # Login / registration / password reset lookups by normalized email.
+        # Partial so legacy case-duplicates (flagged, without email_lower) never conflict.
+        _index(
+            ("email_lower", ASCENDING),
+            unique=True,
+            partialFilterExpression={"email_lower": {"$type": "string"}},
+        ),
+    ],
+    "posts": [
+        # Due-post claims by the scheduler and the dispatcher's preload
+        _index(("status", ASCENDING), ("scheduled_at", ASCENDING)),
+        # /posts/calendar range scans, one per $or branch
+        _index(("owner_id", ASCENDING), ("scheduled_at", ASCENDING)),
+        _index(("owner_id", ASCENDING), ("published_at", ASCENDING)),
+        # Per-user post listings and stats, keyset-paginated on (created_at, _id)
+        _index(("owner_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+        # Legacy owner spellings serve owner queries until the owner_id backfill
+        # is verified (see services/post_owner.py); drop them after rollout
+        _index(("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+        _index(("created_by", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+        # /posts/search: per-user full-text search. language_override points at a field
+        # posts never have, since their own `language` values ("urdu", ...) are not
+        # languages MongoDB's text search supports
+        _index(
+            ("owner_id", ASCENDING), ("caption", TEXT), ("topic", TEXT), ("hashtags", TEXT),
+            weights={"hashtags": 3, "topic": 2, "caption": 1},
+            default_language="english",
+            language_override="text_search_language",
+        ),
+    ],
+    "feedback": [
+        _index(("created_by_user_id", ASCENDING), ("created_at", DESCENDING)),
+        _index(("feature_key", ASCENDING), ("created_at", DESCENDING)),
+        _index(("rating", ASCENDING)),
+        # Unfiltered newest-first listing
+        _index(("created_at", DESCENDING)),
+    ],
+    "automation_settings": [
+        # user + platform should be unique
+        _index(("user_id", ASCENDING), ("platform", ASCENDING), unique=True),
+        # Poll planner: enabled tenants per platform
+        _index(("platform", ASCENDING), ("enabled", ASCENDING)),
+    ],
+    "automation_events": [
+        # query by user, platform, created_at for polling and analytics
+        _index(("user_id", ASCENDING), ("platform", ASCENDING), ("created_at", DESCENDING)),
+        _index(("user_id", ASCENDING), ("event_type", ASCENDING)),
+        # Dedup lookup for every ingested item
+        _index(("idempotency_key", ASCENDING)),
+        # Decision engine: unprocessed events, oldest first
+        _index(("processed_at", ASCENDING), ("created_at", ASCENDING)),
+    ],
+    "automation_actions": [
+        # query by idempotency_key (deduplication), user + status for retry
+        _index(("idempotency_key", ASCENDING), ("user_id", ASCENDING), unique=True),
+        _index(("user_id", ASCENDING), ("status", ASCENDING)),
+        _index(("next_retry_at", ASCENDING)),
+        # Dispatcher: pending actions, oldest first
+        _index(("status", ASCENDING), ("created_at", ASCENDING)),
+    ],
+    "dm_threads": [
+        # query by user + platform + conversation_id (update state)
+        _index(("user_id", ASCENDING), ("platform", ASCENDING), ("conversation_id", ASCENDING), unique=True),
+        _index(("is_paused_by_human", ASCENDING)),
+    ],
+    "poll_cursor_state": [
+        # key state by (user, platform, channel_type)
+        _index(("user_id", ASCENDING), ("platform", ASCENDING), ("channel_type", ASCENDING), unique=True),
+    ],
+    "media_assets": [
+        # one Cloudinary asset per owner, content hash and resource type, looked
+        # up by public URL, by public_id (delete checks) and by perceptual-hash
+        # band for near-duplicates
+        _index(("owner_id", ASCENDING), ("sha256", ASCENDING), ("resource_type", ASCENDING), unique=True),
+        _index(("url", ASCENDING)),
+        _index(("public_id", ASCENDING)),
+        _index(("owner_id", ASCENDING), ("phash_bands", ASCENDING)),
+    ],
+    "ephemeral_state": [
+        # TTL sweep; reads also filter on expires_at
+        _index(("expires_at", ASCENDING), expireAfterSeconds=0),
+    ],
+    "linkedin_settings": [
+        _index(("user_id", ASCENDING)),
+    ],
+    "linkedin_comments": [
+        # Replied-check and upsert per comment
+        _index(("user_id", ASCENDING), ("comment_id", ASCENDING)),
+    ],
+    "linkedin_posts": [
+        # Upsert per synced post
+        _index(("user_id", ASCENDING), ("post_id", ASCENDING)),
+    ],
+}
+
+# Representative shapes of the hot queries; values only need the right types
+_NOW = datetime(2024, 1, 1)
+HOT_QUERIES: List[Dict] = [
+    {"collection": "users", "filter": {"email_lower": "user@example.com"}},
+    {"collection": "posts", "filter": {"status": "scheduled", "scheduled_at": {"$lte": _NOW}},
+     "sort": [("scheduled_at", ASCENDING)]},
+    {"collection": "posts", "filter": {"owner_id": "u1"},
+     "sort": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "posts", "filter": {"$or": [{"created_by": "u1"}, {"user_id": "u1"}]},
+     "sort": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"collection": "posts", "filter": {"$text": {"$search": "launch"}, "owner_id": "u1"}},
+    {"collection": "posts", "filter": {"$or": [
+        {"owner_id": "u1", "scheduled_at": {"$gte": _NOW, "$lt": _NOW}, "status": {"$in": ["scheduled", "publishing"]}},
+        {"owner_id": "u1", "published_at": {"$gte": _NOW, "$lt": _NOW}, "status": "published"},
+    ]}},
+    {"collection": "feedback", "filter": {}, "sort": [("created_at", DESCENDING)]},
+    {"collection": "automation_settings", "filter": {"platform": "facebook", "enabled": True}},
+    {"collection": "automation_settings", "filter": {"user_id": "u1", "platform": "facebook"}},
+    {"collection": "automation_events", "filter": {"idempotency_key": "k"}},
+    {"collection": "automation_events", "filter": {"processed_at": None}, "sort": [("created_at", ASCENDING)]},
+    {"collection": "automation_events",
+     "filter": {"user_id": "u1", "platform": {"$in": ["facebook"]}, "created_at": {"$gte": _NOW}},
+     "sort": [("created_at", DESCENDING)]},
+    {"collection": "automation_actions", "filter": {"status": "pending"}, "sort": [("created_at", ASCENDING)]},
+    {"collection": "automation_actions", "filter": {"status": "failed", "next_retry_at": {"$lte": _NOW}},
+     "sort": [("next_retry_at", ASCENDING)]},
+    {"collection": "automation_actions", "filter": {"user_id": "u1", "idempotency_key": "k"}},
+    {"collection": "automation_actions",
+     "filter": {"user_id": "u1", "platform": "facebook", "status": "sent", "created_at": {"$gte": _NOW}}},
+    {"collection": "dm_threads", "filter": {"user_id": "u1", "platform": "instagram", "conversation_id": "c1"}},
+    {"collection": "poll_cursor_state",
+     "filter": {"user_id": {"$in": ["u1", "u2"]}, "platform": "facebook", "channel_type": "comment_created"}},
+    {"collection": "media_assets", "filter": {"owner_id": "u1", "sha256": "h", "resource_type": "image"}},
+    {"collection": "media_assets", "filter": {"public_id": "posts/images/abc"}},
+    {"collection": "media_assets", "filter": {"url": "https://example.com/a.jpg"}},
+    {"collection": "media_assets", "filter": {"owner_id": "u1", "phash_bands": {"$in": ["0:abcd"]}}},
+    {"collection": "linkedin_settings", "filter": {"user_id": "u1"}},
+    {"collection": "linkedin_comments", "filter": {"user_id": "u1", "comment_id": "c1", "status": "replied"}},
+    {"collection": "linkedin_posts", "filter": {"user_id": "u1", "post_id": "p1"}},
+]
+
+
+def _normalize_keys(keys) -> List[tuple]:
+    return [(field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys]
+
+
+def _key_signature(keys, weights=None) -> tuple:
+    """
+    Comparable form of an index key spec. A live text index reports its
+    text fields as _fts/_ftsx plus a `weights` map, so text fields are
+    compared as a set on both sides.
+    """
+    keys = _normalize_keys(keys)
+    if weights is not None:
+        plain = [key for key in keys if key[0] not in ("_fts", "_ftsx")]
+        text_fields = sorted(weights)
+    else:
+        plain = [key for key in keys if key[1] != TEXT]
+        text_fields = sorted(field for field, direction in keys if direction == TEXT)
+    return plain, text_fields
+
+
+def ensure_indexes(db) -> List[str]:
+    """Create every registered index that is missing; returns the names created"""
+    created = []
+    for collection_name, specs in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        for spec in specs:
+            name = index_name(spec["keys"])
+            if name in existing:
+                continue
+            collection.create_index(spec["keys"], name=name, **spec["options"])
+            created.append(f"{collection_name}.{name}")
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def diff_indexes(db) -> Dict[str, List[str]]:
+    """
+    Compare the live database with the registry.
+    Returns {"missing": [...], "extra": [...], "changed": [...]} as collection.index names.
+    """
+    result = {"missing": [], "extra": [], "changed": []}
+    for collection_name, specs in INDEX_REGISTRY.items():
+        existing = db[collection_name].index_information()
+        registered = {index_name(spec["keys"]): spec for spec in specs}
+        for name, spec in registered.items():
+            live = existing.get(name)
+            if live is None:
+                result["missing"].append(f"{collection_name}.{name}")
+            elif _key_signature(live["key"], live.get("weights")) != _key_signature(spec["keys"]) or (
+                bool(live.get("unique")) != bool(spec["options"].get("unique"))
+            ):
+                result["changed"].append(f"{collection_name}.{name}")
+        for name in existing:
+            if name != "_id_" and name not in registered:
+                result["extra"].append(f"{collection_name}.{name}")
+    return result
+
+
+def drop_unregistered_indexes(db) -> List[str]:
+    """Drop live indexes that are not in the registry (never _id_)"""
+    dropped = []
+    for qualified_name in diff_indexes(db)["extra"]:
+        collection_name, name = qualified_name.split(".", 1)
+        db[collection_name].drop_index(name)
+        dropped.append(qualified_name)
+    return dropped
+
+
+def _find_stages(plan, stage: str) -> bool:
+    """True if any stage in an explain plan tree (classic or SBE) is `stage`"""
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_find_stages(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_find_stages(item, stage) for item in plan)
+    return False
+
+
+def explain_hot_queries(db) -> List[str]:
+    """explain() every hot query; returns descriptions of the ones that scan a collection"""
+    failures = []
+    for query in HOT_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        winning_plan = cursor.limit(100).explain().get("queryPlanner", {}).get("winningPlan", {})
+        if _find_stages(winning_plan, "COLLSCAN"):
+            failures.append(f"{query['collection']} {query['filter']} sort={query.get('sort')}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes declared in the index registry")
+    parser.add_argument("command", choices=["create", "diff", "drop", "explain"])
+    parser.add_argument("--uri", help="MongoDB URI (defaults to the app's MONGO_URI connection)")
+    parser.add_argument("--db", help="Database name (defaults to DB_NAME)")
+    parser.add_argument("--yes", action="store_true", help="Confirm dropping unregistered indexes")
+    args = parser.parse_args(argv)
+
+    if args.uri:
+        db = MongoClient(args.uri)[args.db or "agentic_social"]
+    else:
+        from app.services.database import client, DB_NAME
+        db = client[args.db or DB_NAME]
+
+    if args.command == "create":
+        created = ensure_indexes(db)
+        print(f"Created {len(created)} indexes" + "".join(f"\n  + {name}" for name in created))
+        return 0
+
+    if args.command == "diff":
+        diff = diff_indexes(db)
+        for label, symbol in (("missing", "+"), ("extra", "-"), ("changed", "~")):
+            for name in diff[label]:
+                print(f"{symbol} {name} ({label})")
+        return 1 if any(diff.values()) else 0
+
+    if args.command == "drop":
+        extra = diff_indexes(db)["extra"]
+        if not args.yes:
+            print("Would drop (re-run with --yes):" + "".join(f"\n  - {name}" for name in extra))
+            return 0
+        dropped = drop_unregistered_indexes(db)
+        print(f"Dropped {len(dropped)} indexes" + "".join(f"\n  - {name}" for name in dropped))
+        return 0
+
+    # explain: make sure the registry is applied, then check every hot query's plan
+    ensure_indexes(db)
+    failures = explain_hot_queries(db)
+    for failure in failures:
+        print(f"COLLSCAN: {failure}")
+    print(f"{len(HOT_QUERIES) - len(failures)}/{len(HOT_QUERIES)} hot queries use an index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
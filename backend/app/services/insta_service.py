@@ -1,8 +1,24 @@
 import requests
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from app.config import config
 from typing import List, Dict, Optional
 
+# Container status values reported by the Graph API (status_code / status)
+CONTAINER_READY_STATUSES = {"FINISHED", "VIDEO_READY"}
+CONTAINER_FAILED_STATUSES = {"ERROR", "FAILED", "VIDEO_FAILED", "EXPIRED"}
+
+# Adaptive backoff for container polling: probe early, grow exponentially up to a cap
+CONTAINER_POLL_INITIAL_DELAY = 1.0
+CONTAINER_POLL_MAX_DELAY = 15.0
+CONTAINER_POLL_BACKOFF_FACTOR = 1.6
+REEL_CONTAINER_TIMEOUT_SECONDS = 240
+CAROUSEL_CONTAINER_TIMEOUT_SECONDS = 300
+
+# Bounded pool for creating carousel child containers in parallel
+CAROUSEL_CREATE_MAX_WORKERS = 4
+
 
 class InstaService:
     def __init__(self, ig_user_id: str | None, access_token: str | None, job_tracker=None, job_id: str = None):
@@ -12,6 +28,88 @@ class InstaService:
         self.job_tracker = job_tracker
         self.job_id = job_id
 
+    def _update_message(self, message: str):
+        """Update job progress message if job_tracker is available"""
+        if self.job_tracker and self.job_id:
+            self.job_tracker.update_job(self.job_id, message=message)
+
+    def _fetch_container_statuses(self, container_ids: List[str]) -> Dict:
+        """Fetch status of several media containers in a single Graph API request"""
+        return requests.get(
+            f"https://graph.facebook.com/{self.api_version}/",
+            params={
+                "ids": ",".join(container_ids),
+                "fields": "status_code,status",
+                "access_token": self.token,
+            },
+            timeout=30,
+        ).json()
+
+    def wait_for_containers(self, container_ids: List[str], timeout_seconds: float, label: str = "media") -> Dict:
+        """
+        Wait until all media containers have finished processing.
+
+        Every pending container is checked in one request per round. The delay
+        between rounds starts short (images are usually ready immediately) and
+        grows exponentially with jitter up to CONTAINER_POLL_MAX_DELAY, so long
+        video processing does not hammer the API.
+
+        Returns:
+            {"status": "ready"}
+            {"status": "failed", "container_id": "...", "container_status": "..."}
+            {"status": "timeout", "pending": [...]}
+            {"status": "error", "detail": "..."}
+        """
+        pending = list(dict.fromkeys(container_ids))
+        started = time.monotonic()
+        deadline = started + timeout_seconds
+        delay = CONTAINER_POLL_INITIAL_DELAY
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"status": "timeout", "pending": pending}
+
+            time.sleep(min(delay * random.uniform(0.75, 1.25), remaining))
+            delay = min(delay * CONTAINER_POLL_BACKOFF_FACTOR, CONTAINER_POLL_MAX_DELAY)
+
+            response = self._fetch_container_statuses(pending)
+
+            # Handle API errors including rate limits
+            if "error" in response:
+                error_detail = response.get("error", {})
+                error_code = error_detail.get("code") if isinstance(error_detail, dict) else None
+                error_msg = error_detail.get("message", str(error_detail)) if isinstance(error_detail, dict) else str(error_detail)
+
+                # If rate limited (error code 4), back off to the maximum delay
+                if error_code == 4 or "request limit" in error_msg.lower():
+                    self._update_message("Instagram rate limit reached, waiting longer...")
+                    delay = CONTAINER_POLL_MAX_DELAY
+                    continue
+
+                return {"status": "error", "detail": error_msg}
+
+            still_pending = []
+            for container_id in pending:
+                container = response.get(container_id) or {}
+                # Check status_code first, then fall back to the descriptive status ("Finished: ...")
+                status = container.get("status_code") or container.get("status") or ""
+                status = status.split(":", 1)[0].strip().upper()
+
+                if status in CONTAINER_FAILED_STATUSES:
+                    return {"status": "failed", "container_id": container_id, "container_status": status}
+                if status not in CONTAINER_READY_STATUSES:
+                    still_pending.append(container_id)
+            pending = still_pending
+
+            if pending:
+                elapsed = int(time.monotonic() - started)
+                self._update_message(
+                    f"Processing Instagram {label}... ({len(pending)} pending, ~{elapsed}s elapsed)"
+                )
+
+        return {"status": "ready"}
+
     def publish_photo(self, image_url: str, caption: str):
         if not self.ig_user_id or not self.token:
             return {"status": "error", "detail": "Instagram credentials not configured"}
@@ -47,6 +145,32 @@ class InstaService:
 
         return {"status": "success", "data": r2}
     
+    def _create_carousel_item(self, media_item: Dict) -> Dict:
+        """Create a single carousel child container and return the raw API response"""
+        url = f"https://graph.facebook.com/{self.api_version}/{self.ig_user_id}/media"
+        media_url = media_item.get("url")
+        media_type = media_item.get("type", "image")
+        
+        # Key: is_carousel_item allows videos in carousel
+        if media_type == "video":
+            payload = {
+                "video_url": media_url,
+                "media_type": "VIDEO",
+                "is_carousel_item": "true",  # Critical for carousel support
+                "access_token": self.token,
+            }
+        else:
+            payload = {
+                "image_url": media_url,
+                "is_carousel_item": "true",  # Critical for carousel support
+                "access_token": self.token,
+            }
+        
+        try:
+            return requests.post(url, data=payload, timeout=60).json()
+        except Exception as e:
+            return {"error": str(e)}
+    
     def publish_carousel(self, media_items: List[Dict], caption: str):
         """
         Publish a carousel (multiple images/videos mixed) to Instagram
@@ -68,103 +192,39 @@ class InstaService:
         media_items = sorted(media_items, key=lambda x: x.get("order", 0))
         
         try:
-            # Step 1: Create individual containers for each media item with is_carousel_item flag
+            # Step 1: Create individual containers for each media item concurrently.
+            # executor.map keeps results in carousel order regardless of completion order.
+            max_workers = min(CAROUSEL_CREATE_MAX_WORKERS, len(media_items))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = list(executor.map(self._create_carousel_item, media_items))
+            
             item_ids = []
-            for idx, media_item in enumerate(media_items):
-                url = f"https://graph.facebook.com/{self.api_version}/{self.ig_user_id}/media"
-                media_url = media_item.get("url")
-                media_type = media_item.get("type", "image")
-                
-                # Key: is_carousel_item allows videos in carousel
-                if media_type == "video":
-                    payload = {
-                        "video_url": media_url,
-                        "media_type": "VIDEO",
-                        "is_carousel_item": "true",  # Critical for carousel support
-                        "access_token": self.token,
-                    }
-                else:
-                    payload = {
-                        "image_url": media_url,
-                        "is_carousel_item": "true",  # Critical for carousel support
-                        "access_token": self.token,
-                    }
-                
-                response = requests.post(url, data=payload, timeout=60).json()
-                
+            for idx, (media_item, response) in enumerate(zip(media_items, responses)):
                 if "id" not in response:
                     return {"status": "error", "detail": f"Failed to create carousel item {idx + 1}: {response}"}
                 
-                media_id = response["id"]
-                item_ids.append({"id": media_id, "type": media_type})
-                
-                # Wait and check status - use smart polling to avoid rate limits
-                # Videos need MORE time in carousels, images are usually instant
-                if media_type == "video":
-                    if self.job_tracker and self.job_id:
-                        self.job_tracker.update_job(
-                            self.job_id,
-                            message=f"Processing carousel video {idx + 1}/{len(media_items)} (this may take time)..."
-                        )
-                    
-                    # Use progressive backoff for videos
-                    max_attempts = 10
-                    wait_time = 8  # Start with 8 seconds for carousel videos
-                    
-                    for attempt in range(max_attempts):
-                        # Wait FIRST
-                        time.sleep(wait_time)
-                        
-                        status_url = f"https://graph.facebook.com/{self.api_version}/{media_id}"
-                        status_response = requests.get(
-                            status_url,
-                            params={"fields": "status_code,status", "access_token": self.token},
-                            timeout=30
-                        ).json()
-                        
-                        # Handle errors including rate limits
-                        if "error" in status_response:
-                            error_detail = status_response.get("error", {})
-                            error_code = error_detail.get("code") if isinstance(error_detail, dict) else None
-                            
-                            # If rate limited, back off significantly
-                            if error_code == 4:
-                                if self.job_tracker and self.job_id:
-                                    self.job_tracker.update_job(
-                                        self.job_id,
-                                        message="Rate limit reached, waiting longer..."
-                                    )
-                                wait_time += 15
-                                continue
-                            # Other errors
-                            return {"status": "error", "detail": f"Error checking video status for item {idx + 1}: {error_detail}"}
-                        
-                        # Check status
-                        status = status_response.get("status_code") or status_response.get("status")
-                        
-                        if status in ["VIDEO_READY", "FINISHED"]:
-                            break
-                        elif status in ["VIDEO_FAILED", "FAILED", "ERROR"]:
-                            return {"status": "error", "detail": f"Video processing failed for item {idx + 1}: {status}"}
-                        
-                        # Still processing - increase wait time
-                        wait_time += 4  # Progressive backoff
-                else:
-                    # Images process quickly, just do a quick check
-                    time.sleep(2)
-                    status_url = f"https://graph.facebook.com/{self.api_version}/{media_id}"
-                    status_response = requests.get(
-                        status_url,
-                        params={"fields": "status", "access_token": self.token},
-                        timeout=30
-                    ).json()
-                    
-                    status = status_response.get("status")
-                    if status == "FAILED":
-                        return {"status": "error", "detail": f"Image processing failed for item {idx + 1}"}
+                item_ids.append({"id": response["id"], "type": media_item.get("type", "image")})
+            
+            # Wait for all children together - images are usually ready on the first probe
+            video_count = sum(1 for item in item_ids if item["type"] == "video")
+            if video_count:
+                self._update_message(
+                    f"Processing {video_count} carousel video(s) (this may take time)..."
+                )
             
-            # Wait extra time before creating carousel to ensure all items are truly ready
-            time.sleep(3)
+            wait_result = self.wait_for_containers(
+                [item["id"] for item in item_ids],
+                timeout_seconds=CAROUSEL_CONTAINER_TIMEOUT_SECONDS,
+                label="carousel items",
+            )
+            
+            if wait_result["status"] == "failed":
+                idx = next(i for i, item in enumerate(item_ids) if item["id"] == wait_result["container_id"])
+                kind = "Video" if item_ids[idx]["type"] == "video" else "Image"
+                return {"status": "error", "detail": f"{kind} processing failed for item {idx + 1}: {wait_result['container_status']}"}
+            if wait_result["status"] == "error":
+                return {"status": "error", "detail": f"Error checking carousel item status: {wait_result['detail']}"}
+            # On timeout, proceed and let carousel creation report anything still not ready
             
             # Step 2: Create carousel container using just the IDs
             carousel_url = f"https://graph.facebook.com/{self.api_version}/{self.ig_user_id}/media"
@@ -187,8 +247,7 @@ class InstaService:
                 
                 # If it's a transient error (code 2), retry once
                 if error_code == 2:
-                    import time as time_module
-                    time_module.sleep(3)  # Wait 3 seconds and retry
+                    time.sleep(3)  # Wait 3 seconds and retry
                     carousel_response = requests.post(carousel_url, data=carousel_payload, timeout=60).json()
                     
                     if "id" not in carousel_response:
@@ -251,68 +310,22 @@ class InstaService:
             
             media_id = response["id"]
             
-            # Step 2: Smart Polling with Linear Backoff to avoid rate limits
-            # Videos need significant processing time - be patient!
-            max_attempts = 8
-            wait_time = 10  # Start with 10 seconds (reels need time to process)
+            # Step 2: Wait for the container with adaptive backoff
+            self._update_message("Processing Instagram reel...")
+            wait_result = self.wait_for_containers(
+                [media_id],
+                timeout_seconds=REEL_CONTAINER_TIMEOUT_SECONDS,
+                label="reel",
+            )
             
-            for attempt in range(max_attempts):
-                # WAIT FIRST before checking status (don't spam the API)
-                if self.job_tracker and self.job_id:
-                    elapsed_time = wait_time * (attempt + 1)
-                    self.job_tracker.update_job(
-                        self.job_id,
-                        message=f"Processing Instagram reel... (attempt {attempt + 1}/{max_attempts}, ~{elapsed_time}s elapsed)"
-                    )
-                
-                time.sleep(wait_time)
-                
-                status_url = f"https://graph.facebook.com/{self.api_version}/{media_id}"
-                status_response = requests.get(
-                    status_url,
-                    params={"fields": "status_code,status", "access_token": self.token},  # Query both fields
-                    timeout=30
-                ).json()
-                
-                # Handle API errors including rate limits
-                if "error" in status_response:
-                    error_detail = status_response.get("error", {})
-                    error_code = error_detail.get("code") if isinstance(error_detail, dict) else None
-                    error_msg = error_detail.get("message", str(error_detail)) if isinstance(error_detail, dict) else str(error_detail)
-                    
-                    # If rate limited (error code 4), back off significantly
-                    if error_code == 4 or "request limit" in error_msg.lower():
-                        if self.job_tracker and self.job_id:
-                            self.job_tracker.update_job(
-                                self.job_id,
-                                message="Instagram rate limit reached, waiting longer..."
-                            )
-                        wait_time += 15  # Increase wait by 15 seconds
-                        continue
-                    
-                    # Other errors - return immediately
-                    return {"status": "error", "detail": f"Error checking media status: {error_msg}"}
-                
-                # Check status_code first (for reels), then fall back to status
-                status = status_response.get("status_code") or status_response.get("status")
-                
-                # Success states
-                if status == "FINISHED" or status == "VIDEO_READY":
-                    if self.job_tracker and self.job_id:
-                        self.job_tracker.update_job(
-                            self.job_id,
-                            message="Instagram reel processed, publishing to feed..."
-                        )
-                    break
-                
-                # Failure states
-                if status == "ERROR" or status == "VIDEO_FAILED" or status == "FAILED":
-                    return {"status": "error", "detail": f"Video processing failed with status {status}"}
-                
-                # Still processing - increase wait time for next attempt (linear backoff)
-                wait_time += 5  # Add 5 seconds each time
+            if wait_result["status"] == "failed":
+                return {"status": "error", "detail": f"Video processing failed with status {wait_result['container_status']}"}
+            if wait_result["status"] == "error":
+                return {"status": "error", "detail": f"Error checking media status: {wait_result['detail']}"}
+            if wait_result["status"] == "ready":
+                self._update_message("Instagram reel processed, publishing to feed...")
             
-            # After loop ends, proceed to publish (assume ready even if status check timed out)
+            # After timeout, proceed to publish (assume ready even if status check timed out)
             
             # Step 3: Publish the reel
             publish_url = f"https://graph.facebook.com/{self.api_version}/{self.ig_user_id}/media_publish"
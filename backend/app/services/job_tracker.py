@@ -2,25 +2,80 @@
 Job tracking system for long-running publish operations.
 Tracks progress of social media publishing jobs.
 """
+import time
 import uuid
-from typing import Dict, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 from threading import Lock
 
+DEFAULT_JOB_TTL_MINUTES = 60
+DEFAULT_MAX_JOBS = 5000
+# Only jobs in these states may be evicted to enforce the entry cap
+TERMINAL_JOB_STATUSES = {"completed", "failed"}
+
+
 class JobTracker:
     """
     In-memory job tracking system.
     Stores job status, progress, and results.
+
+    Jobs are kept in creation order in a deque of (created_at, job_id), so
+    expiry and the max-entries cap only ever pop from the left: eviction is
+    amortized O(1) and never has to scan or parse every stored job. The cap
+    never drops a job that is still running; such jobs are re-queued at the
+    back, so the cap can be exceeded while every tracked job is in flight.
     """
-    
-    def __init__(self):
+
+    def __init__(self, ttl_minutes: int = DEFAULT_JOB_TTL_MINUTES, max_jobs: int = DEFAULT_MAX_JOBS):
         self.jobs: Dict[str, dict] = {}
         self.lock = Lock()
-    
+        self.ttl_seconds = ttl_minutes * 60
+        self.max_jobs = max_jobs
+        # (monotonic creation time, job_id), oldest first
+        self._expiry_queue: Deque[Tuple[float, str]] = deque()
+        self._jobs_by_user: Dict[str, Set[str]] = {}
+
+    def _remove_job(self, job_id: str):
+        """Drop a job and its user index entry (caller holds the lock)"""
+        job = self.jobs.pop(job_id, None)
+        if not job:
+            return
+        user_jobs = self._jobs_by_user.get(job["user_id"])
+        if user_jobs is not None:
+            user_jobs.discard(job_id)
+            if not user_jobs:
+                del self._jobs_by_user[job["user_id"]]
+
+    def _evict(self, max_age_seconds: float) -> int:
+        """Pop expired jobs and enforce the entry cap (caller holds the lock)"""
+        now = time.monotonic()
+        cutoff = now - max_age_seconds
+        removed = 0
+        while self._expiry_queue and self._expiry_queue[0][0] <= cutoff:
+            _, job_id = self._expiry_queue.popleft()
+            self._remove_job(job_id)
+            removed += 1
+
+        # Each entry is looked at once per pass, so a queue of running jobs cannot spin
+        for _ in range(len(self._expiry_queue)):
+            if len(self._expiry_queue) <= self.max_jobs:
+                break
+            _, job_id = self._expiry_queue.popleft()
+            job = self.jobs.get(job_id)
+            if job is not None and job["status"] not in TERMINAL_JOB_STATUSES:
+                # Re-queued with a fresh timestamp to keep the deque in time order
+                self._expiry_queue.append((now, job_id))
+                continue
+            self._remove_job(job_id)
+            removed += 1
+        return removed
+
     def create_job(self, user_id: str) -> str:
         """Create a new job and return its ID"""
         job_id = str(uuid.uuid4())
-        
+        now = datetime.utcnow().isoformat()
+
         with self.lock:
             self.jobs[job_id] = {
                 "job_id": job_id,
@@ -29,24 +84,27 @@ class JobTracker:
                 "progress": 0,
                 "message": "Initializing...",
                 "platforms": {},
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
+                "created_at": now,
+                "updated_at": now,
                 "result": None,
                 "error": None
             }
-        
+            self._expiry_queue.append((time.monotonic(), job_id))
+            self._jobs_by_user.setdefault(user_id, set()).add(job_id)
+            self._evict(self.ttl_seconds)
+
         return job_id
-    
-    def update_job(self, job_id: str, status: Optional[str] = None, 
+
+    def update_job(self, job_id: str, status: Optional[str] = None,
                    progress: Optional[int] = None, message: Optional[str] = None,
                    platform_status: Optional[Dict[str, str]] = None):
         """Update job status and progress"""
+        updated_at = datetime.utcnow().isoformat()
         with self.lock:
-            if job_id not in self.jobs:
+            job = self.jobs.get(job_id)
+            if job is None:
                 return
-            
-            job = self.jobs[job_id]
-            
+
             if status:
                 job["status"] = status
             if progress is not None:
@@ -55,54 +113,58 @@ class JobTracker:
                 job["message"] = message
             if platform_status:
                 job["platforms"].update(platform_status)
-            
-            job["updated_at"] = datetime.utcnow().isoformat()
-    
+
+            job["updated_at"] = updated_at
+
     def complete_job(self, job_id: str, result: dict):
         """Mark job as completed with result"""
+        updated_at = datetime.utcnow().isoformat()
         with self.lock:
-            if job_id not in self.jobs:
+            job = self.jobs.get(job_id)
+            if job is None:
                 return
-            
-            job = self.jobs[job_id]
+
             job["status"] = "completed"
             job["progress"] = 100
             job["message"] = "Publishing completed"
             job["result"] = result
-            job["updated_at"] = datetime.utcnow().isoformat()
-    
+            job["updated_at"] = updated_at
+
     def fail_job(self, job_id: str, error: str):
         """Mark job as failed with error"""
+        updated_at = datetime.utcnow().isoformat()
         with self.lock:
-            if job_id not in self.jobs:
+            job = self.jobs.get(job_id)
+            if job is None:
                 return
-            
-            job = self.jobs[job_id]
+
             job["status"] = "failed"
             job["message"] = "Publishing failed"
             job["error"] = error
-            job["updated_at"] = datetime.utcnow().isoformat()
-    
+            job["updated_at"] = updated_at
+
     def get_job(self, job_id: str) -> Optional[dict]:
-        """Get job status"""
+        """Get a snapshot of the job status"""
         with self.lock:
-            return self.jobs.get(job_id)
-    
-    def cleanup_old_jobs(self, max_age_minutes: int = 60):
-        """Remove jobs older than specified minutes"""
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "platforms": dict(job["platforms"])}
+
+    def get_user_jobs(self, user_id: str) -> List[dict]:
+        """Get snapshots of all tracked jobs for a user"""
+        with self.lock:
+            job_ids = self._jobs_by_user.get(user_id, ())
+            return [
+                {**self.jobs[job_id], "platforms": dict(self.jobs[job_id]["platforms"])}
+                for job_id in job_ids
+            ]
+
+    def cleanup_old_jobs(self, max_age_minutes: Optional[int] = None) -> int:
+        """Remove jobs older than specified minutes and return how many were removed"""
+        max_age_seconds = self.ttl_seconds if max_age_minutes is None else max_age_minutes * 60
         with self.lock:
-            current_time = datetime.utcnow()
-            jobs_to_remove = []
-            
-            for job_id, job in self.jobs.items():
-                created_at = datetime.fromisoformat(job["created_at"])
-                age_minutes = (current_time - created_at).total_seconds() / 60
-                
-                if age_minutes > max_age_minutes:
-                    jobs_to_remove.append(job_id)
-            
-            for job_id in jobs_to_remove:
-                del self.jobs[job_id]
+            return self._evict(max_age_seconds)
 
 
 # Global job tracker instance
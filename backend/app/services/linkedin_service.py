@@ -1,11 +1,25 @@
 import requests
 import time
 import logging
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
 from datetime import datetime
+from app.services import media_registry
+from app.services.media_transfer import SizedStreamBody, open_remote_media
 
 logger = logging.getLogger(__name__)
 
+IMAGE_RECIPE = "urn:li:digitalmediaRecipe:feedshare-image"
+VIDEO_RECIPE = "urn:li:digitalmediaRecipe:feedshare-video"
+SINGLE_UPLOAD_MECHANISM = "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"
+MULTIPART_UPLOAD_MECHANISM = "com.linkedin.digitalmedia.uploading.MultipartUpload"
+# Videos above this size use LinkedIn multipart upload instead of a single PUT
+MULTIPART_UPLOAD_THRESHOLD = 200 * 1024 * 1024
+
+# Bounded pool for the per-image download/register/upload pipeline.
+# LinkedIn allows at most 9 images per post, so every image gets its own worker.
+IMAGE_UPLOAD_MAX_WORKERS = 9
+
 
 class LinkedInService:
     """Service for publishing content to LinkedIn Personal Profile"""
@@ -73,49 +87,111 @@ class LinkedInService:
             logger.error(f"LinkedIn API error: {exc}", exc_info=True)
             return {"status": "error", "detail": str(exc)}
     
-    def _register_upload(self, file_size: int) -> str:
-        """Register file upload and get upload URL"""
+    def _register_upload_request(self, file_size: int, media_type: str, mechanism: str) -> Dict[str, Any]:
+        """Call assets?action=registerUpload and return the response value"""
         endpoint = "/assets?action=registerUpload"
+        recipe = VIDEO_RECIPE if media_type == "video" else IMAGE_RECIPE
         payload = {
             "registerUploadRequest": {
                 "owner": f"urn:li:person:{self.user_id}",
-                "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
+                "recipes": [recipe],
                 "serviceRelationships": [
                     {
                         "relationshipType": "OWNER",
                         "identifier": "urn:li:userGeneratedContent"
                     }
                 ],
-                "supportedUploadMechanism": ["SYNCHRONOUS_UPLOAD"],
+                "supportedUploadMechanism": [mechanism],
                 "fileSize": file_size,
             }
         }
         
         response = self._make_request("POST", endpoint, data=payload)
-        
         if "value" in response and "uploadMechanism" in response["value"]:
-            upload_url = response["value"]["uploadMechanism"]["com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"]["uploadUrl"]
-            asset_id = response["value"].get("asset")
-            return asset_id, upload_url
+            return response["value"]
         
         logger.error(f"Upload registration failed: {response}")
-        return None, None
+        return {}
+    
+    def _register_upload(self, file_size: int, media_type: str = "image") -> str:
+        """Register a single-request file upload and get upload URL"""
+        value = self._register_upload_request(file_size, media_type, "SYNCHRONOUS_UPLOAD")
+        single_upload = value.get("uploadMechanism", {}).get(SINGLE_UPLOAD_MECHANISM)
+        if not single_upload:
+            return None, None
+        return value.get("asset"), single_upload["uploadUrl"]
     
-    def _upload_file(self, file_url: str, upload_url: str, file_data: bytes) -> bool:
-        """Upload file to LinkedIn's storage"""
+    def _upload_file(self, file_url: str, upload_url: str, file_data, media_type: str = "image") -> bool:
+        """Upload file to LinkedIn's storage (bytes or a streaming SizedStreamBody)"""
         try:
             headers = {
                 "Authorization": f"Bearer {self.token}",
                 "Content-Type": "application/octet-stream",
-                "media-type-family": "STILLIMAGE"
+                "media-type-family": "VIDEO" if media_type == "video" else "STILLIMAGE"
             }
-            response = requests.put(upload_url, data=file_data, headers=headers, timeout=60)
+            timeout = (10, 300) if media_type == "video" else 60
+            response = requests.put(upload_url, data=file_data, headers=headers, timeout=timeout)
             response.raise_for_status()
             return True
         except Exception as exc:
             logger.error(f"File upload failed: {exc}")
             return False
     
+    def _upload_video_multipart(self, source, file_size: int) -> Optional[str]:
+        """
+        Upload a large video with LinkedIn's multipart mechanism.
+        Parts are read from the source one at a time, so at most one part
+        is held in memory.
+        """
+        value = self._register_upload_request(file_size, "video", "MULTIPART_UPLOAD")
+        multipart = value.get("uploadMechanism", {}).get(MULTIPART_UPLOAD_MECHANISM)
+        if not multipart:
+            return None
+        
+        part_requests = sorted(
+            multipart.get("partUploadRequests", []),
+            key=lambda part: part["byteRange"]["firstByte"],
+        )
+        part_responses = []
+        
+        for idx, part in enumerate(part_requests):
+            first_byte = part["byteRange"]["firstByte"]
+            last_byte = part["byteRange"]["lastByte"]
+            part_data = source.read(last_byte - first_byte + 1)
+            
+            progress = 50 + int(25 * idx / len(part_requests))
+            self._update_progress("publishing", progress, f"Uploading video part {idx + 1}/{len(part_requests)}...", {"linkedin": "publishing"})
+            
+            try:
+                response = requests.put(part["url"], data=part_data, headers=part.get("headers") or {}, timeout=(10, 120))
+                response.raise_for_status()
+            except Exception as exc:
+                logger.error(f"Video part {idx + 1} upload failed: {exc}")
+                return None
+            
+            part_responses.append({
+                "headers": {
+                    "ETag": response.headers.get("ETag"),
+                    "Content-Length": str(len(part_data)),
+                },
+                "httpStatusCode": response.status_code,
+            })
+        
+        endpoint = "/assets?action=completeMultiPartUpload"
+        payload = {
+            "completeMultipartUploadRequest": {
+                "mediaArtifact": value.get("mediaArtifact"),
+                "metadata": multipart.get("metadata"),
+                "partUploadResponses": part_responses,
+            }
+        }
+        response = self._make_request("POST", endpoint, data=payload)
+        if response.get("status") == "error":
+            logger.error(f"Completing multipart upload failed: {response}")
+            return None
+        
+        return value.get("asset")
+    
     def _download_file_bytes(self, url: str) -> bytes:
         """Download file from URL as bytes"""
         try:
@@ -126,6 +202,38 @@ class LinkedInService:
             logger.error(f"File download failed: {exc}")
             return None
     
+    def _upload_image_asset(self, image_url: str) -> Optional[str]:
+        """Download an image, register it with LinkedIn and upload it. Returns the asset URN."""
+        try:
+            # Reuse an asset this member already uploaded for the same media
+            cached_asset = media_registry.get_platform_asset(image_url, "linkedin", self.user_id)
+            if cached_asset:
+                logger.info(f"Reusing LinkedIn asset {cached_asset} for {image_url}")
+                return cached_asset
+            
+            # Download file
+            file_data = self._download_file_bytes(image_url)
+            if not file_data:
+                logger.warning(f"Failed to download image: {image_url}")
+                return None
+            
+            # Register upload
+            asset_id, upload_url = self._register_upload(len(file_data))
+            if not asset_id or not upload_url:
+                logger.warning(f"Failed to register upload for: {image_url}")
+                return None
+            
+            # Upload file
+            if self._upload_file(image_url, upload_url, file_data):
+                logger.info(f"Image uploaded: {asset_id}")
+                media_registry.set_platform_asset(image_url, "linkedin", self.user_id, asset_id)
+                return asset_id
+            
+            logger.warning(f"Failed to upload image: {image_url}")
+        except Exception as exc:
+            logger.error(f"Image processing failed for {image_url}: {exc}")
+        return None
+    
     def publish_text(self, text: str) -> Dict[str, Any]:
         """
         Publish text-only post to LinkedIn
@@ -203,34 +311,22 @@ class LinkedInService:
         
         # Limit to 9 images per LinkedIn post
         image_urls = image_urls[:9]
-        assets = []
         
-        for idx, image_url in enumerate(image_urls):
-            progress = 20 + int(40 * idx / len(image_urls))
-            self._update_progress("publishing", progress, f"Processing image {idx + 1}/{len(image_urls)}...", {"linkedin": "publishing"})
-            
-            try:
-                # Download file
-                file_data = self._download_file_bytes(image_url)
-                if not file_data:
-                    logger.warning(f"Failed to download image: {image_url}")
-                    continue
-                
-                # Register upload
-                asset_id, upload_url = self._register_upload(len(file_data))
-                if not asset_id or not upload_url:
-                    logger.warning(f"Failed to register upload for: {image_url}")
-                    continue
-                
-                # Upload file
-                if self._upload_file(image_url, upload_url, file_data):
-                    assets.append(asset_id)
-                    logger.info(f"Image uploaded: {asset_id}")
-                else:
-                    logger.warning(f"Failed to upload image: {image_url}")
-            except Exception as exc:
-                logger.error(f"Image processing failed for {image_url}: {exc}")
-                continue
+        # Download, register and upload every image concurrently; results are
+        # slotted back by index so asset order matches the input order.
+        uploaded = [None] * len(image_urls)
+        max_workers = min(IMAGE_UPLOAD_MAX_WORKERS, len(image_urls))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_idx = {
+                executor.submit(self._upload_image_asset, image_url): idx
+                for idx, image_url in enumerate(image_urls)
+            }
+            for done, future in enumerate(as_completed(future_to_idx), start=1):
+                uploaded[future_to_idx[future]] = future.result()
+                progress = 20 + int(40 * done / len(image_urls))
+                self._update_progress("publishing", progress, f"Processed image {done}/{len(image_urls)}...", {"linkedin": "publishing"})
+        
+        assets = [asset_id for asset_id in uploaded if asset_id]
         
         if not assets:
             error_msg = "Failed to upload all images"
@@ -305,27 +401,41 @@ class LinkedInService:
         self._update_progress("publishing", 20, "Registering video for upload...", {"linkedin": "publishing"})
         
         try:
-            # Download video file
-            file_data = self._download_file_bytes(video_url)
-            if not file_data:
+            # Open the video as a stream; nothing is buffered beyond one chunk
+            try:
+                source, file_size = open_remote_media(video_url)
+            except Exception as exc:
+                logger.error(f"Video download failed: {exc}")
                 error_msg = "Failed to download video"
                 self._update_progress("publishing", 30, error_msg, {"linkedin": "failed"})
                 return {"status": "error", "detail": error_msg}
             
-            # Register upload
-            asset_id, upload_url = self._register_upload(len(file_data))
-            if not asset_id or not upload_url:
-                error_msg = "Failed to register video upload"
-                self._update_progress("publishing", 40, error_msg, {"linkedin": "failed"})
-                return {"status": "error", "detail": error_msg}
-            
-            self._update_progress("publishing", 50, "Uploading video file...", {"linkedin": "publishing"})
-            
-            # Upload video
-            if not self._upload_file(video_url, upload_url, file_data):
-                error_msg = "Failed to upload video file"
-                self._update_progress("publishing", 60, error_msg, {"linkedin": "failed"})
-                return {"status": "error", "detail": error_msg}
+            try:
+                if file_size > MULTIPART_UPLOAD_THRESHOLD:
+                    self._update_progress("publishing", 50, "Uploading video file in parts...", {"linkedin": "publishing"})
+                    asset_id = self._upload_video_multipart(source, file_size)
+                    if not asset_id:
+                        error_msg = "Failed to upload video file"
+                        self._update_progress("publishing", 60, error_msg, {"linkedin": "failed"})
+                        return {"status": "error", "detail": error_msg}
+                else:
+                    # Register upload
+                    asset_id, upload_url = self._register_upload(file_size, media_type="video")
+                    if not asset_id or not upload_url:
+                        error_msg = "Failed to register video upload"
+                        self._update_progress("publishing", 40, error_msg, {"linkedin": "failed"})
+                        return {"status": "error", "detail": error_msg}
+                    
+                    self._update_progress("publishing", 50, "Uploading video file...", {"linkedin": "publishing"})
+                    
+                    # Stream video straight from the source into the PUT body
+                    body = SizedStreamBody(source, file_size)
+                    if not self._upload_file(video_url, upload_url, body, media_type="video"):
+                        error_msg = "Failed to upload video file"
+                        self._update_progress("publishing", 60, error_msg, {"linkedin": "failed"})
+                        return {"status": "error", "detail": error_msg}
+            finally:
+                source.close()
             
             self._update_progress("publishing", 75, "Creating post with video...", {"linkedin": "publishing"})
             
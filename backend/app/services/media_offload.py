@@ -0,0 +1,103 @@
+"""
+Keeps inline base64 media out of post documents.
+Data-URI images and media items are uploaded to Cloudinary when a post is
+written, and the post keeps only the hosted URL, the Cloudinary public_id
+and a small thumbnail URL. Uploads that fail leave the inline value in
+place so nothing is lost; the background migration retries them.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.services.image_service import ImageService
+
+logger = logging.getLogger(__name__)
+
+# Matches values offload can decode (data URIs that carry base64, not e.g. URL-encoded SVG)
+INLINE_BASE64_PATTERN = r"^data:[^,]*;base64,"
+THUMBNAIL_WIDTH = 320
+OFFLOAD_MAX_WORKERS = 4
+
+
+def is_inline_base64(value) -> bool:
+    if not isinstance(value, str) or not value.startswith("data:"):
+        return False
+    header = value[:value.find(",")] if "," in value[:256] else ""
+    return header.endswith(";base64")
+
+
+def thumbnail_url(url: Optional[str], resource_type: str = "image") -> Optional[str]:
+    """Cloudinary delivery URL for a small preview (first frame for videos); None for other hosts"""
+    if not url or "res.cloudinary.com" not in url or "/upload/" not in url:
+        return None
+    if resource_type == "video":
+        thumb = url.replace("/upload/", f"/upload/so_0,c_limit,w_{THUMBNAIL_WIDTH}/", 1)
+        return thumb.rsplit(".", 1)[0] + ".jpg"
+    return url.replace("/upload/", f"/upload/c_limit,w_{THUMBNAIL_WIDTH}/", 1)
+
+
+def _offload_image(image: str, owner_id: str) -> Dict:
+    result = ImageService.upload_base64_to_cloudinary(image, "image", owner_id)
+    if result["status"] != "success":
+        logger.warning(f"Keeping inline post image, upload failed: {result.get('detail')}")
+        return {}
+    return {
+        "image": result["url"],
+        "image_public_id": result.get("public_id"),
+        "image_thumbnail": thumbnail_url(result["url"]),
+    }
+
+
+def _offload_media_item(item, owner_id: str):
+    """Return the item with inline url/thumbnail replaced by hosted ones (unchanged on failure)"""
+    if not isinstance(item, dict):
+        return item
+    item = {key: value for key, value in item.items() if key != "base64"}
+    media_type = item.get("type", "image")
+
+    if is_inline_base64(item.get("url")):
+        result = ImageService.upload_base64_to_cloudinary(item["url"], media_type, owner_id)
+        if result["status"] != "success":
+            logger.warning(f"Keeping inline {media_type} media item, upload failed: {result.get('detail')}")
+            return item
+        item["url"] = result["url"]
+        item["public_id"] = result.get("public_id")
+        for key in ("width", "height", "duration", "format"):
+            if result.get(key) is not None:
+                item[key] = result[key]
+
+    if not item.get("thumbnail") or is_inline_base64(item.get("thumbnail")):
+        thumb = thumbnail_url(item.get("url"), media_type)
+        if thumb:
+            item["thumbnail"] = thumb
+        else:
+            item.pop("thumbnail", None)
+    return item
+
+
+def _has_inline_items(media) -> bool:
+    return isinstance(media, list) and any(
+        isinstance(item, dict) and (is_inline_base64(item.get("url")) or is_inline_base64(item.get("thumbnail")))
+        for item in media
+    )
+
+
+def has_inline_media(post: Dict) -> bool:
+    return is_inline_base64(post.get("image")) or _has_inline_items(post.get("media"))
+
+
+def offload_post_media(post: Dict, owner_id: str) -> Dict:
+    """
+    Upload a post's inline base64 image/media to Cloudinary on behalf of owner_id.
+    Returns only the fields to $set (empty if nothing was inline).
+    """
+    updates = {}
+    if is_inline_base64(post.get("image")):
+        updates.update(_offload_image(post["image"], owner_id))
+
+    media = post.get("media")
+    if _has_inline_items(media):
+        # executor.map keeps the carousel order
+        with ThreadPoolExecutor(max_workers=min(OFFLOAD_MAX_WORKERS, len(media))) as executor:
+            updates["media"] = list(executor.map(_offload_media_item, media, [owner_id] * len(media)))
+    return updates
@@ -0,0 +1,240 @@
+"""
+Header-only media probing over HTTP range requests.
+Reads just the bytes needed to find image dimensions (JPEG SOF, PNG IHDR,
+WebP VP8/VP8L/VP8X, GIF logical screen) or MP4/MOV video dimensions and
+duration (moov/mvhd/tkhd), so validating a carousel transfers kilobytes
+instead of whole files.
+"""
+import logging
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+PROBE_BLOCK_SIZE = 16 * 1024
+# Hosts that ignore Range are read from the start only up to this many bytes
+MAX_NON_RANGE_BYTES = 1024 * 1024
+# moov boxes larger than this are not fetched (would defeat header-only probing)
+MAX_MOOV_BYTES = 4 * 1024 * 1024
+PROBE_MAX_WORKERS = 8
+
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class _RangeReader:
+    """Random-access reads over a URL, one Range request per uncached block"""
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+        self.size: Optional[int] = None
+        self.bytes_fetched = 0
+        self._cache_offset = 0
+        self._cache = b""
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        cache_end = self._cache_offset + len(self._cache)
+        if self._cache_offset <= offset and offset + size <= cache_end:
+            start = offset - self._cache_offset
+            return self._cache[start:start + size]
+
+        fetch_size = max(size, PROBE_BLOCK_SIZE)
+        headers = {"Range": f"bytes={offset}-{offset + fetch_size - 1}"}
+        with requests.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 206:
+                data = response.raw.read(fetch_size, decode_content=True)
+                content_range = response.headers.get("Content-Range", "")
+                total = content_range.rsplit("/", 1)[-1]
+                if total.isdigit():
+                    self.size = int(total)
+                self._cache_offset = offset
+            elif response.status_code == 200:
+                # Range ignored: the body starts at byte 0
+                if offset + size > MAX_NON_RANGE_BYTES:
+                    raise IOError("Host does not support range requests")
+                data = response.raw.read(offset + fetch_size, decode_content=True)
+                length = response.headers.get("Content-Length", "")
+                if length.isdigit():
+                    self.size = int(length)
+                self._cache_offset = 0
+            else:
+                raise IOError(f"HTTP {response.status_code}")
+
+        self._cache = data
+        self.bytes_fetched += len(data)
+        start = offset - self._cache_offset
+        return self._cache[start:start + size]
+
+
+def _probe_jpeg(reader: _RangeReader) -> Optional[Dict]:
+    offset = 2  # skip SOI
+    while True:
+        marker = reader.read_at(offset, 4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:  # fill byte
+            offset += 1
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:  # standalone markers
+            offset += 2
+            continue
+        segment_length = struct.unpack(">H", marker[2:4])[0]
+        if code in _JPEG_SOF_MARKERS:
+            sof = reader.read_at(offset + 4, 5)
+            if len(sof) < 5:
+                return None
+            height, width = struct.unpack(">HH", sof[1:5])
+            return {"format": "jpeg", "width": width, "height": height}
+        if code == 0xDA:  # start of scan without a frame header
+            return None
+        offset += 2 + segment_length
+
+
+def _probe_png(head: bytes) -> Optional[Dict]:
+    if len(head) < 24 or head[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", head[16:24])
+    return {"format": "png", "width": width, "height": height}
+
+
+def _probe_gif(head: bytes) -> Optional[Dict]:
+    if len(head) < 10:
+        return None
+    width, height = struct.unpack("<HH", head[6:10])
+    return {"format": "gif", "width": width, "height": height}
+
+
+def _probe_webp(head: bytes) -> Optional[Dict]:
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        width, height = width & 0x3FFF, height & 0x3FFF
+    elif chunk == b"VP8L":
+        bits = struct.unpack("<I", head[21:25])[0]
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+    elif chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+    else:
+        return None
+    return {"format": "webp", "width": width, "height": height}
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield (type, payload_start, box_end) for ISO-BMFF boxes inside data"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _parse_moov(moov: bytes) -> Dict:
+    result = {}
+    for box_type, payload, box_end in _iter_boxes(moov):
+        if box_type == b"mvhd":
+            version = moov[payload]
+            if version == 1:
+                timescale, duration = struct.unpack(">IQ", moov[payload + 20:payload + 32])
+            else:
+                timescale, duration = struct.unpack(">II", moov[payload + 12:payload + 20])
+            if timescale:
+                result["duration"] = round(duration / timescale, 3)
+        elif box_type == b"trak" and "width" not in result:
+            for child_type, child_payload, child_end in _iter_boxes(moov, payload, box_end):
+                if child_type != b"tkhd":
+                    continue
+                # width/height are the last 8 bytes (16.16 fixed point), preceded by the 3x3 matrix
+                width, height = struct.unpack(">II", moov[child_end - 8:child_end])
+                width, height = width >> 16, height >> 16
+                if width and height:
+                    matrix_a = struct.unpack(">i", moov[child_end - 44:child_end - 40])[0]
+                    if matrix_a == 0:  # rotated 90/270 degrees: displayed dimensions are swapped
+                        width, height = height, width
+                    result["width"], result["height"] = width, height
+    return result
+
+
+def _probe_mp4(reader: _RangeReader) -> Optional[Dict]:
+    """Walk top-level boxes with small header reads until moov is found, then parse it"""
+    offset = 0
+    while reader.size is None or offset < reader.size:
+        header = reader.read_at(offset, 16)
+        if len(header) < 8:
+            return None
+        size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = (reader.size or 0) - offset
+        if size < header_size:
+            return None
+
+        if box_type == b"moov":
+            if size > MAX_MOOV_BYTES:
+                return None
+            moov = reader.read_at(offset + header_size, size - header_size)
+            parsed = _parse_moov(moov)
+            if not parsed.get("width"):
+                return None
+            return {"format": "mp4", **parsed}
+        offset += size
+    return None
+
+
+def probe_url(url: str) -> Optional[Dict]:
+    """
+    Read media dimensions (and duration for video) from the file header.
+
+    Returns {"format", "width", "height", ["duration"], "bytes_fetched"} or None.
+    """
+    if not url or url.startswith("data:"):
+        return None
+    try:
+        reader = _RangeReader(url)
+        head = reader.read_at(0, 32)
+        if head.startswith(b"\xff\xd8"):
+            result = _probe_jpeg(reader)
+        elif head.startswith(b"\x89PNG\r\n\x1a\n"):
+            result = _probe_png(head)
+        elif head[:6] in (b"GIF87a", b"GIF89a"):
+            result = _probe_gif(head)
+        elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            result = _probe_webp(head)
+        elif head[4:8] in (b"ftyp", b"moov", b"wide", b"mdat", b"free"):
+            result = _probe_mp4(reader)
+        else:
+            result = None
+        if result:
+            result["bytes_fetched"] = reader.bytes_fetched
+        return result
+    except Exception as e:
+        logger.warning(f"Failed to probe media header for {url}: {e}")
+        return None
+
+
+def probe_many(urls: List[str], max_workers: int = PROBE_MAX_WORKERS) -> Dict[str, Optional[Dict]]:
+    """Probe several URLs concurrently; returns {url: probe_result_or_None}"""
+    unique_urls = list(dict.fromkeys(url for url in urls if url))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls))) as executor:
+        return dict(zip(unique_urls, executor.map(probe_url, unique_urls)))
@@ -0,0 +1,190 @@
+"""
+Content-addressed media registry.
+Maps a media file's sha256 (plus a perceptual hash for near-duplicate images)
+to its Cloudinary URL, dimensions, MIME type and any platform asset IDs
+(e.g. LinkedIn asset URNs) with their expiry, so uploads, validation and
+platform asset registration can skip redundant transfers.
+
+Entries are scoped per owner: a user only ever reuses assets they uploaded,
+so deleting an asset can never break another user's posts or hand out a
+public_id they could delete.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, List, Optional
+
+from PIL import Image
+from pymongo.errors import DuplicateKeyError
+
+from app.services.database import media_assets_collection
+
+logger = logging.getLogger(__name__)
+
+HASH_READ_CHUNK = 1024 * 1024
+# A 64-bit dHash split into 4 bands: any two hashes within Hamming distance 3
+# share at least one identical band, which makes near-duplicate lookup indexable.
+PHASH_BAND_COUNT = 4
+NEAR_DUPLICATE_MAX_DISTANCE = 3
+# How long a platform-side asset (e.g. LinkedIn asset URN) is reused
+PLATFORM_ASSET_TTL = {
+    "linkedin": timedelta(hours=24),
+}
+
+
+def hash_file(file_obj: BinaryIO) -> str:
+    """Return the sha256 hex digest of a file object, leaving it at position 0"""
+    hasher = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(HASH_READ_CHUNK), b""):
+        hasher.update(chunk)
+    file_obj.seek(0)
+    return hasher.hexdigest()
+
+
+def compute_image_fingerprint(file_obj: BinaryIO) -> Dict:
+    """
+    Read dimensions, MIME type and a 64-bit difference hash (dHash) of an image.
+    JPEGs are decoded in draft mode at reduced scale, so this stays cheap even
+    for large photos. Returns {} if the file is not a readable image.
+    """
+    try:
+        file_obj.seek(0)
+        with Image.open(file_obj) as img:
+            width, height = img.size
+            mime_type = Image.MIME.get(img.format)
+            img.draft("L", (64, 64))
+            pixels = list(img.convert("L").resize((9, 8)).getdata())
+        bits = 0
+        for row in range(8):
+            for col in range(8):
+                left = pixels[row * 9 + col]
+                right = pixels[row * 9 + col + 1]
+                bits = (bits << 1) | (1 if left > right else 0)
+        return {
+            "width": width,
+            "height": height,
+            "mime_type": mime_type,
+            "phash": f"{bits:016x}",
+        }
+    except Exception as exc:
+        logger.warning(f"Could not fingerprint image: {exc}")
+        return {}
+    finally:
+        file_obj.seek(0)
+
+
+def _phash_bands(phash: str) -> List[str]:
+    band_len = len(phash) // PHASH_BAND_COUNT
+    return [f"{i}:{phash[i * band_len:(i + 1) * band_len]}" for i in range(PHASH_BAND_COUNT)]
+
+
+def _hamming_distance(hash_a: str, hash_b: str) -> int:
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+
+def find_by_hash(sha256: str, resource_type: str, owner_id: str) -> Optional[dict]:
+    """Exact content lookup among the owner's assets"""
+    return media_assets_collection.find_one(
+        {"owner_id": str(owner_id), "sha256": sha256, "resource_type": resource_type}
+    )
+
+
+def find_by_public_id(public_id: str) -> Optional[dict]:
+    """Registry entry for a Cloudinary public_id (includes owner_id)"""
+    return media_assets_collection.find_one({"public_id": public_id}, {"owner_id": 1, "resource_type": 1})
+
+
+def forget_media(public_id: str, owner_id: str) -> int:
+    """Remove the owner's registry entries for a deleted asset so it is never reused"""
+    result = media_assets_collection.delete_many({"public_id": public_id, "owner_id": str(owner_id)})
+    return result.deleted_count
+
+
+def find_by_url(url: str) -> Optional[dict]:
+    """Lookup by public (Cloudinary) URL"""
+    if not url:
+        return None
+    return media_assets_collection.find_one({"url": url})
+
+
+def find_near_duplicates(
+    phash: str,
+    owner_id: str,
+    max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+    limit: int = 5,
+) -> List[dict]:
+    """The owner's images whose perceptual hash is within max_distance bits of phash, closest first"""
+    if not phash:
+        return []
+    candidates = media_assets_collection.find(
+        {"owner_id": str(owner_id), "phash_bands": {"$in": _phash_bands(phash)}},
+        {"url": 1, "public_id": 1, "phash": 1, "width": 1, "height": 1},
+    ).limit(200)
+    matches = []
+    for doc in candidates:
+        distance = _hamming_distance(phash, doc["phash"])
+        if distance <= max_distance:
+            matches.append({**doc, "distance": distance})
+    matches.sort(key=lambda doc: doc["distance"])
+    return matches[:limit]
+
+
+def register_media(
+    sha256: str,
+    resource_type: str,
+    url: str,
+    public_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    **metadata,
+) -> None:
+    """
+    Record an asset uploaded by owner_id. Metadata such as width, height,
+    duration, mime_type, format, bytes and phash is stored when provided.
+    """
+    if not owner_id:
+        return
+    owner_id = str(owner_id)
+    fields = {key: value for key, value in metadata.items() if value is not None}
+    if fields.get("phash"):
+        fields["phash_bands"] = _phash_bands(fields["phash"])
+
+    now = datetime.utcnow()
+    try:
+        media_assets_collection.update_one(
+            {"owner_id": owner_id, "sha256": sha256, "resource_type": resource_type},
+            {
+                "$setOnInsert": {"url": url, "public_id": public_id, "created_at": now},
+                "$set": {**fields, "updated_at": now},
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # Lost an upsert race with a concurrent upload of the same content
+        pass
+
+
+def get_platform_asset(url: str, platform: str, owner_id: str) -> Optional[str]:
+    """Return a still-valid platform asset ID previously registered for this media"""
+    doc = media_assets_collection.find_one(
+        {"url": url},
+        {f"platform_assets.{platform}.{owner_id}": 1},
+    )
+    asset = ((doc or {}).get("platform_assets") or {}).get(platform, {}).get(owner_id)
+    if not asset or asset.get("expires_at", datetime.min) <= datetime.utcnow():
+        return None
+    return asset.get("asset_id")
+
+
+def set_platform_asset(url: str, platform: str, owner_id: str, asset_id: str) -> None:
+    """Remember a platform asset ID for a registered media URL"""
+    ttl = PLATFORM_ASSET_TTL.get(platform, timedelta(hours=1))
+    media_assets_collection.update_one(
+        {"url": url},
+        {"$set": {
+            f"platform_assets.{platform}.{owner_id}": {
+                "asset_id": asset_id,
+                "expires_at": datetime.utcnow() + ttl,
+            }
+        }},
+    )
@@ -0,0 +1,131 @@
+"""
+Streaming media transfer helpers for publishing.
+Pipes remote media (e.g. Cloudinary URLs) into platform uploads in fixed-size
+chunks, so memory per upload stays constant instead of growing with file size.
+"""
+import logging
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024  # 4MB
+# Downloads of unknown length are spooled; anything above this spills to disk
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+def get_remote_file_size(url: str) -> Optional[int]:
+    """Return the Content-Length of a remote file via HEAD, or None if unknown"""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=15)
+        if response.ok:
+            length = response.headers.get("Content-Length", "")
+            if length.isdigit():
+                return int(length)
+    except requests.RequestException as exc:
+        logger.warning(f"HEAD request failed for {url}: {exc}")
+    return None
+
+
+def iter_remote_chunks(url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream a remote file as a generator of byte chunks"""
+    with requests.get(url, stream=True, timeout=(10, 60)) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+
+
+class RemoteMediaStream:
+    """
+    File-like reader over a streaming download.
+    read(size) buffers at most one network chunk beyond the requested size.
+    The download only starts on the first read.
+    """
+
+    def __init__(self, url: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._chunks = iter_remote_chunks(url, chunk_size)
+        self._buffer = bytearray()
+        self._exhausted = False
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size and not self._exhausted:
+            try:
+                self._buffer.extend(next(self._chunks))
+            except StopIteration:
+                self._exhausted = True
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def skip(self, size: int) -> None:
+        """Discard the next `size` bytes without holding them all in memory"""
+        while size > 0:
+            data = self.read(min(size, DEFAULT_CHUNK_SIZE))
+            if not data:
+                break
+            size -= len(data)
+
+    def close(self) -> None:
+        self._chunks.close()
+        self._buffer.clear()
+
+
+class SizedStreamBody:
+    """
+    Request body that streams exactly `length` bytes from a reader.
+    Exposing __len__ lets requests send a Content-Length header instead of
+    falling back to chunked transfer encoding.
+    """
+
+    def __init__(self, reader, length: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.reader = reader
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        remaining = self.length
+        while remaining > 0:
+            chunk = self.reader.read(min(self.chunk_size, remaining))
+            if not chunk:
+                raise IOError(f"Media source ended {remaining} bytes before the expected length")
+            remaining -= len(chunk)
+            yield chunk
+
+
+def open_remote_media(url: str) -> Tuple[object, int]:
+    """
+    Open a remote file for streaming and return (reader, size).
+
+    When the host reports Content-Length the reader streams straight from the
+    network. Otherwise the file is spooled to a temporary file (in memory up
+    to SPOOL_MAX_MEMORY, on disk beyond that) so its size is known before
+    upload. Callers must close() the returned reader.
+    """
+    size = get_remote_file_size(url)
+    if size:
+        return RemoteMediaStream(url), size
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    try:
+        for chunk in iter_remote_chunks(url):
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    size = spool.tell()
+    spool.seek(0)
+    return spool, size
+
+
+def skip_bytes(reader, size: int) -> None:
+    """Advance a reader by `size` bytes (works for streams and spooled files)"""
+    if hasattr(reader, "skip"):
+        reader.skip(size)
+    else:
+        reader.seek(size, 1)
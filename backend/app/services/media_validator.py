@@ -2,10 +2,9 @@
 Media validation utilities for social media publishing.
 Validates aspect ratios, file sizes, and formats.
 """
-import requests
 from typing import Dict, List, Tuple, Optional
-from PIL import Image
-from io import BytesIO
+from app.services import media_registry
+from app.services.media_probe import probe_many, probe_url
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,18 +15,59 @@ def get_aspect_ratio(width: int, height: int) -> float:
     return width / height if height > 0 else 0
 
 
+def _known_dimensions(item: Dict) -> Optional[Tuple[int, int]]:
+    """Dimensions stored on the item at upload time, or in the media registry"""
+    if item.get("width") and item.get("height"):
+        return item["width"], item["height"]
+    
+    registered = media_registry.find_by_url(item.get("url"))
+    if registered and registered.get("width") and registered.get("height"):
+        return registered["width"], registered["height"]
+    return None
+
+
 def get_image_dimensions_from_url(url: str) -> Optional[Tuple[int, int]]:
-    """Download image and get its dimensions"""
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            img = Image.open(BytesIO(response.content))
-            return img.size  # Returns (width, height)
-    except Exception as e:
-        logger.error(f"Failed to get image dimensions from {url}: {str(e)}")
+    """
+    Get media dimensions from the media registry, or by reading only the file
+    header (a few KB via Range requests) when the URL is unknown
+    """
+    dimensions = _known_dimensions({"url": url})
+    if dimensions:
+        return dimensions
+    
+    probed = probe_url(url)
+    if probed:
+        return probed["width"], probed["height"]
+    logger.error(f"Failed to get media dimensions from {url}")
     return None
 
 
+def get_media_dimensions(item: Dict) -> Optional[Tuple[int, int]]:
+    """
+    Resolve (width, height) for a carousel item: metadata stored on the item
+    at upload time first, then the media registry, then a header probe
+    """
+    return _known_dimensions(item) or get_image_dimensions_from_url(item.get("url"))
+
+
+def resolve_media_dimensions(media_items: List[Dict]) -> List[Optional[Tuple[int, int]]]:
+    """
+    Resolve dimensions for several items, probing every unknown URL
+    concurrently so a carousel costs one round of small Range requests
+    """
+    dimensions = [_known_dimensions(item) for item in media_items]
+    unknown_urls = [item.get("url") for item, dims in zip(media_items, dimensions) if not dims]
+    if unknown_urls:
+        probed = probe_many(unknown_urls)
+        for idx, item in enumerate(media_items):
+            result = probed.get(item.get("url")) if not dimensions[idx] else None
+            if result:
+                dimensions[idx] = (result["width"], result["height"])
+        fetched = sum(result["bytes_fetched"] for result in probed.values() if result)
+        logger.info(f"Probed {len(probed)} media headers ({fetched} bytes transferred)")
+    return dimensions
+
+
 def aspect_ratios_match(ratio1: float, ratio2: float, tolerance: float = 0.01) -> bool:
     """Check if two aspect ratios match within tolerance"""
     return abs(ratio1 - ratio2) <= tolerance
@@ -44,47 +84,37 @@ def validate_carousel_aspect_ratios(media_items: List[Dict]) -> Dict:
     aspect_ratios = []
     details = []
     
-    for idx, item in enumerate(media_items):
-        media_url = item.get("url")
+    # Images and videos are validated the same way, from stored metadata where possible
+    all_dimensions = resolve_media_dimensions(media_items)
+    
+    for idx, (item, dimensions) in enumerate(zip(media_items, all_dimensions)):
         media_type = item.get("type", "image")
         
-        # For images, get actual dimensions
-        if media_type == "image":
-            dimensions = get_image_dimensions_from_url(media_url)
-            if dimensions:
-                width, height = dimensions
-                ratio = get_aspect_ratio(width, height)
-                aspect_ratios.append(ratio)
-                details.append({
-                    "index": idx,
-                    "type": media_type,
-                    "width": width,
-                    "height": height,
-                    "ratio": round(ratio, 3)
-                })
-            else:
-                # Couldn't get dimensions, assume it might work
-                logger.warning(f"Could not validate dimensions for image {idx}")
-                details.append({
-                    "index": idx,
-                    "type": media_type,
-                    "error": "Could not fetch dimensions"
-                })
+        if dimensions:
+            width, height = dimensions
+            ratio = get_aspect_ratio(width, height)
+            aspect_ratios.append(ratio)
+            details.append({
+                "index": idx,
+                "type": media_type,
+                "width": width,
+                "height": height,
+                "ratio": round(ratio, 3)
+            })
         else:
-            # For videos, we can't easily get dimensions from URL without downloading
-            # Cloudinary URLs might have transformation params we could parse
-            # For now, note that validation is limited
+            # Couldn't get dimensions, assume it might work
+            logger.warning(f"Could not validate dimensions for {media_type} {idx}")
             details.append({
                 "index": idx,
                 "type": media_type,
-                "note": "Video aspect ratio not validated (requires download)"
+                "error": "Could not fetch dimensions"
             })
     
     # Check if we have at least 2 measurable ratios
     if len(aspect_ratios) < 2:
         return {
             "valid": True,  # Can't validate without dimensions
-            "message": "Unable to validate all aspect ratios (videos require download)",
+            "message": "Unable to validate all aspect ratios (dimensions unknown)",
             "warning": "Instagram may reject carousel if aspect ratios don't match",
             "details": details
         }
@@ -0,0 +1,216 @@
+"""
+One-off data migrations.
+Each migration records a marker document in the `migrations` collection when
+it completes, so startup only pays for a single indexed lookup afterwards.
+"""
+import logging
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from app.services.database import media_assets_collection, migrations_collection, posts_collection, users_collection
+from app.services.media_offload import INLINE_BASE64_PATTERN, has_inline_media, offload_post_media
+from app.services.post_owner import OWNER_ID_MIGRATION, OWNER_PROJECTION, mark_owner_id_ready, owner_of
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = 500
+# Posts with inline media are multi-megabyte; load only a few at a time
+MEDIA_OFFLOAD_BATCH_SIZE = 20
+
+
+def _is_applied(name: str) -> bool:
+    return migrations_collection.find_one({"_id": name}, {"_id": 1}) is not None
+
+
+def _mark_applied(name: str, **details) -> None:
+    migrations_collection.update_one(
+        {"_id": name},
+        {"$set": {"applied_at": datetime.utcnow(), **details}},
+        upsert=True,
+    )
+
+
+def _flush(collection, operations: list) -> int:
+    """Write and clear the pending operations; returns how many documents matched"""
+    if not operations:
+        return 0
+    result = collection.bulk_write(operations, ordered=False)
+    operations.clear()
+    return result.matched_count
+
+
+def backfill_email_lower() -> dict:
+    """
+    Give every user a normalized `email_lower` for exact-match lookups.
+
+    Older data can hold several users whose emails differ only in case. The
+    most recently updated one (the account login already picked) receives
+    email_lower; the others are flagged with email_lower_conflict, which keeps
+    the unique index on email_lower buildable.
+    """
+    name = "users.email_lower"
+    if _is_applied(name):
+        return {"status": "skipped"}
+
+    winners = {}
+    for user in users_collection.find(
+        {"email": {"$type": "string"}},
+        {"email": 1, "email_lower": 1, "updated_at": 1, "created_at": 1},
+    ):
+        email_lower = user["email"].strip().lower()
+        # Users that already hold email_lower always win their group
+        rank = (
+            bool(user.get("email_lower")),
+            user.get("updated_at") or datetime.min,
+            user.get("created_at") or datetime.min,
+        )
+        current = winners.get(email_lower)
+        if current is None or rank > current[0]:
+            winners[email_lower] = (rank, user["_id"])
+
+    winner_ids = {user_id for _, user_id in winners.values()}
+    operations = []
+    backfilled = conflicts = 0
+    for user in users_collection.find(
+        {"email": {"$type": "string"}, "email_lower": {"$exists": False}},
+        {"email": 1},
+    ):
+        if user["_id"] in winner_ids:
+            update = {"$set": {"email_lower": user["email"].strip().lower()}}
+            backfilled += 1
+        else:
+            update = {"$set": {"email_lower_conflict": True}}
+            conflicts += 1
+        operations.append(UpdateOne({"_id": user["_id"]}, update))
+        if len(operations) >= MIGRATION_BATCH_SIZE:
+            _flush(users_collection, operations)
+    _flush(users_collection, operations)
+
+    _mark_applied(name, backfilled=backfilled, conflicts=conflicts)
+    logger.info(f"Migration {name}: backfilled {backfilled} users, flagged {conflicts} case-duplicates")
+    return {"status": "success", "backfilled": backfilled, "conflicts": conflicts}
+
+
+def backfill_post_owner_id() -> dict:
+    """
+    Copy each post's legacy owner (created_by, else user_id) into owner_id.
+    Online: new posts are already dual-written, so this only touches older
+    documents. The marker - which switches owner reads to owner_id - is only
+    written once a recount finds no owned post left without owner_id.
+    """
+    name = OWNER_ID_MIGRATION
+    if _is_applied(name):
+        return {"status": "skipped"}
+
+    operations = []
+    backfilled = 0
+    for post in posts_collection.find(
+        {"owner_id": {"$exists": False}},
+        {"created_by": 1, "user_id": 1},
+        batch_size=MIGRATION_BATCH_SIZE,
+    ):
+        owner = post.get("created_by") or post.get("user_id")
+        if not owner:
+            continue
+        operations.append(UpdateOne(
+            {"_id": post["_id"], "owner_id": {"$exists": False}},
+            {"$set": {"owner_id": str(owner)}},
+        ))
+        backfilled += 1
+        if len(operations) >= MIGRATION_BATCH_SIZE:
+            _flush(posts_collection, operations)
+    _flush(posts_collection, operations)
+
+    # Verify: writers still on the old code may have inserted posts meanwhile
+    missing = posts_collection.count_documents({
+        "owner_id": {"$exists": False},
+        "$or": [{"created_by": {"$nin": [None, ""]}}, {"user_id": {"$nin": [None, ""]}}],
+    })
+    if missing == 0:
+        _mark_applied(name, backfilled=backfilled)
+        mark_owner_id_ready()
+    logger.info(f"Migration {name}: backfilled {backfilled} posts, {missing} still without owner_id")
+    return {"status": "success", "backfilled": backfilled, "missing": missing}
+
+
+def offload_inline_post_media() -> dict:
+    """
+    Move inline base64 images and media items out of existing posts into
+    Cloudinary, in small batches. Runs in the background; the marker is only
+    written once no post has inline media left, so failed uploads are
+    retried on the next run. Each write only applies while the post still
+    holds the values that were uploaded; posts edited in the meantime are
+    left for the next run.
+    """
+    name = "posts.offload_inline_media"
+    if _is_applied(name):
+        return {"status": "skipped"}
+
+    inline_query = {
+        "$or": [
+            {"image": {"$regex": INLINE_BASE64_PATTERN}},
+            {"media.url": {"$regex": INLINE_BASE64_PATTERN}},
+            {"media.thumbnail": {"$regex": INLINE_BASE64_PATTERN}},
+        ]
+    }
+    post_ids = [post["_id"] for post in posts_collection.find(inline_query, {"_id": 1})]
+
+    offloaded = remaining = 0
+    for start in range(0, len(post_ids), MEDIA_OFFLOAD_BATCH_SIZE):
+        batch_ids = post_ids[start:start + MEDIA_OFFLOAD_BATCH_SIZE]
+        operations = []
+        for post in posts_collection.find({"_id": {"$in": batch_ids}}, {"image": 1, "media": 1, **OWNER_PROJECTION}):
+            updates = offload_post_media(post, owner_of(post))
+            if updates:
+                unchanged = {field: post.get(field) for field in ("image", "media") if field in updates}
+                operations.append(UpdateOne({"_id": post["_id"], **unchanged}, {"$set": updates}))
+            if has_inline_media({**post, **updates}):
+                remaining += 1
+            else:
+                offloaded += 1
+        written = len(operations)
+        stale = written - _flush(posts_collection, operations)
+        if stale:
+            # Edited while uploading; their uploads are reused by hash on the next run
+            offloaded -= min(stale, offloaded)
+            remaining += stale
+        logger.info(f"Migration {name}: {start + len(batch_ids)}/{len(post_ids)} posts processed")
+
+    if remaining == 0:
+        _mark_applied(name, offloaded=offloaded)
+    logger.info(f"Migration {name}: offloaded {offloaded} posts, {remaining} still inline")
+    return {"status": "success", "offloaded": offloaded, "remaining": remaining}
+
+
+def scope_media_assets_by_owner() -> dict:
+    """
+    Drop the global unique (sha256, resource_type) index on media_assets; the
+    per-owner index replacing it lets each user register their own copy.
+    Entries written before scoping have no owner_id and are never reused.
+    """
+    name = "media_assets.owner_scope"
+    if _is_applied(name):
+        return {"status": "skipped"}
+
+    legacy_index = "sha256_1_resource_type_1"
+    dropped = legacy_index in media_assets_collection.index_information()
+    if dropped:
+        media_assets_collection.drop_index(legacy_index)
+    unowned = media_assets_collection.count_documents({"owner_id": {"$exists": False}})
+
+    _mark_applied(name, dropped_index=dropped, unowned=unowned)
+    logger.info(f"Migration {name}: dropped global hash index={dropped}, {unowned} unowned entries left unused")
+    return {"status": "success", "dropped_index": dropped, "unowned": unowned}
+
+
+def run_startup_migrations() -> None:
+    """Apply pending migrations that indexes depend on - call before creating indexes"""
+    backfill_email_lower()
+    scope_media_assets_by_owner()
+
+
+def run_background_migrations() -> None:
+    """Apply pending migrations that can run while the app serves traffic"""
+    backfill_post_owner_id()
+    offload_inline_post_media()
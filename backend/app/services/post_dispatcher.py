@@ -0,0 +1,149 @@
+"""
+Due-time dispatcher for scheduled posts.
+Keeps the next few minutes of scheduled posts in an in-memory heap and wakes
+when the earliest one is due, so posts fire within about a second of
+scheduled_at instead of waiting for the next minute tick. The heap is
+preloaded from the (status, scheduled_at) index and kept current by the
+notify_* hooks called wherever a post is scheduled, rescheduled or removed.
+"""
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from threading import Condition, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.database import posts_collection
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_HORIZON_MINUTES = 10
+# How often the heap is rebuilt from Mongo (must be shorter than the horizon)
+DISPATCH_REFRESH_MINUTES = 5
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Mongo returns naive UTC datetimes; API payloads are timezone-aware"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class DueTimeDispatcher:
+    """
+    Min-heap of (due timestamp, post_id) with lazy deletion: a reschedule
+    pushes a new entry and records the current due time in _due_times, and
+    stale heap entries are skipped when they reach the top.
+    """
+
+    def __init__(self, horizon_minutes: int = DISPATCH_HORIZON_MINUTES):
+        self.horizon_seconds = horizon_minutes * 60
+        self._heap: List[Tuple[float, str]] = []
+        self._due_times: Dict[str, float] = {}
+        self._condition = Condition()
+        self._on_due: Optional[Callable[[], object]] = None
+        self._thread: Optional[Thread] = None
+        self._running = False
+
+    def start(self, on_due: Callable[[], object]):
+        """Start the dispatch thread; on_due is called whenever posts become due"""
+        with self._condition:
+            if self._running:
+                return
+            self._on_due = on_due
+            self._running = True
+        self._thread = Thread(target=self._run, name="post-dispatcher", daemon=True)
+        self._thread.start()
+        self.refresh()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def refresh(self) -> int:
+        """Rebuild the heap from scheduled posts due within the horizon"""
+        horizon = datetime.now(timezone.utc) + timedelta(seconds=self.horizon_seconds)
+        upcoming = posts_collection.find(
+            {"status": "scheduled", "scheduled_at": {"$lte": horizon}},
+            {"scheduled_at": 1},
+        ).sort("scheduled_at", 1)
+        due_times = {str(post["_id"]): _to_timestamp(post["scheduled_at"]) for post in upcoming}
+
+        with self._condition:
+            self._due_times = due_times
+            self._heap = [(due, post_id) for post_id, due in due_times.items()]
+            heapq.heapify(self._heap)
+            self._condition.notify_all()
+        return len(due_times)
+
+    def schedule(self, post_id: str, scheduled_at: datetime):
+        """Track a newly scheduled or rescheduled post if it falls within the horizon"""
+        due = _to_timestamp(scheduled_at)
+        with self._condition:
+            if due > time.time() + self.horizon_seconds:
+                # Picked up by a later refresh
+                self._due_times.pop(post_id, None)
+                return
+            self._due_times[post_id] = due
+            heapq.heappush(self._heap, (due, post_id))
+            self._condition.notify_all()
+
+    def unschedule(self, post_id: str):
+        with self._condition:
+            self._due_times.pop(post_id, None)
+
+    def _pop_due(self) -> int:
+        """Pop every current due entry (caller holds the condition lock)"""
+        now = time.time()
+        popped = 0
+        while self._heap and self._heap[0][0] <= now:
+            due, post_id = heapq.heappop(self._heap)
+            if self._due_times.get(post_id) == due:
+                del self._due_times[post_id]
+                popped += 1
+        return popped
+
+    def _next_delay(self) -> Optional[float]:
+        """Seconds until the next live entry, dropping stale ones (caller holds the lock)"""
+        while self._heap and self._due_times.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return self._heap[0][0] - time.time()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running:
+                    delay = self._next_delay()
+                    if delay is not None and delay <= 0:
+                        break
+                    self._condition.wait(timeout=delay)
+                if not self._running:
+                    return
+                due_count = self._pop_due()
+
+            if due_count:
+                logger.info(f"Dispatching {due_count} due scheduled posts")
+                try:
+                    # Claims every due post, including any we popped together
+                    self._on_due()
+                except Exception as e:
+                    logger.error(f"Scheduled post dispatch failed: {e}", exc_info=True)
+
+
+post_dispatcher = DueTimeDispatcher()
+
+
+def notify_post_scheduled(post_id, scheduled_at: Optional[datetime]):
+    """Hook for writes that set a post to scheduled (create, reschedule)"""
+    if scheduled_at is None:
+        post_dispatcher.unschedule(str(post_id))
+    else:
+        post_dispatcher.schedule(str(post_id), scheduled_at)
+
+
+def notify_post_unscheduled(post_id):
+    """Hook for writes that take a post out of the scheduled state (cancel, delete)"""
+    post_dispatcher.unschedule(str(post_id))
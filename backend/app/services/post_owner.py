@@ -0,0 +1,66 @@
+"""
+Canonical post ownership.
+Posts historically stored their owner as `created_by` (posts/create) or
+`user_id` (content/save). New posts also carry a canonical `owner_id`, and
+the posts.owner_id migration backfills it on older documents. Until that
+backfill is verified, owner queries keep the legacy $or over both fields;
+afterwards they use the (owner_id, created_at) index directly.
+"""
+import logging
+import time
+from threading import Lock
+
+from app.services.database import migrations_collection
+
+logger = logging.getLogger(__name__)
+
+OWNER_ID_MIGRATION = "posts.owner_id"
+# How often a process re-checks for the migration marker until it appears
+OWNER_ID_CHECK_SECONDS = 60
+
+# Fetch these to resolve a post's owner with owner_of()
+OWNER_PROJECTION = {"owner_id": 1, "created_by": 1, "user_id": 1}
+
+_owner_id_ready = False
+_owner_id_checked_at = 0.0
+_owner_id_lock = Lock()
+
+
+def owner_fields(user_id) -> dict:
+    """Owner fields to write on a new post (legacy spellings kept during rollout)"""
+    user_id = str(user_id)
+    return {"owner_id": user_id, "created_by": user_id, "user_id": user_id}
+
+
+def owner_of(post: dict):
+    """The post owner's user id as a string, or None"""
+    owner = post.get("owner_id") or post.get("created_by") or post.get("user_id")
+    return str(owner) if owner else None
+
+
+def owner_id_reads_enabled() -> bool:
+    """True once the owner_id backfill has been verified; never flips back"""
+    global _owner_id_ready, _owner_id_checked_at
+    if _owner_id_ready:
+        return True
+    with _owner_id_lock:
+        if not _owner_id_ready and time.monotonic() - _owner_id_checked_at >= OWNER_ID_CHECK_SECONDS:
+            _owner_id_checked_at = time.monotonic()
+            if migrations_collection.find_one({"_id": OWNER_ID_MIGRATION}, {"_id": 1}):
+                _owner_id_ready = True
+                logger.info("Post owner queries switched to owner_id")
+        return _owner_id_ready
+
+
+def mark_owner_id_ready() -> None:
+    """Switch this process to owner_id reads right after it verified the backfill"""
+    global _owner_id_ready
+    _owner_id_ready = True
+
+
+def owner_query(user_id) -> dict:
+    """Filter matching every post owned by user_id"""
+    user_id = str(user_id)
+    if owner_id_reads_enabled():
+        return {"owner_id": user_id}
+    return {"$or": [{"created_by": user_id}, {"user_id": user_id}]}
@@ -0,0 +1,110 @@
+"""
+Per-user post statistics.
+Each user has one counter document in `post_stats` holding post counts by
+status. Writers adjust it with $inc when a post is created, changes status
+or is deleted, so reading stats is a single _id lookup. The document is
+rebuilt from one $group aggregation when it is missing or older than
+POST_STATS_REBUILD_HOURS, which also heals any drift from lost increments.
+Every $inc also bumps a `generation` counter; a rebuild only replaces the
+document if the generation it started from is unchanged, so increments
+that land while it aggregates are never overwritten.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from app.services.database import post_stats_collection, posts_collection
+from app.services.post_owner import owner_query
+
+logger = logging.getLogger(__name__)
+
+POST_STATS_REBUILD_HOURS = 24
+# Rebuilds racing with writers retry this many times before serving the fresh counts unsaved
+POST_STATS_REBUILD_ATTEMPTS = 3
+
+# "publishing" is the scheduler's transient lease state; it still counts as scheduled
+_STATUS_BUCKETS = {"publishing": "scheduled"}
+
+
+def _bucket(status) -> str:
+    return _STATUS_BUCKETS.get(status, status) or "draft"
+
+
+def _apply(owner_id, increments: dict) -> None:
+    """$inc the user's counters; a missing document is left for the next rebuild"""
+    if not owner_id or not increments:
+        return
+    try:
+        post_stats_collection.update_one({"_id": str(owner_id)}, {"$inc": {**increments, "generation": 1}})
+    except PyMongoError as e:
+        logger.warning(f"Could not update post stats for user {owner_id}: {e}")
+
+
+def record_post_created(owner_id, status) -> None:
+    _apply(owner_id, {"total": 1, f"counts.{_bucket(status)}": 1})
+
+
+def record_post_status_change(owner_id, old_status, new_status) -> None:
+    old_bucket, new_bucket = _bucket(old_status), _bucket(new_status)
+    if old_bucket != new_bucket:
+        _apply(owner_id, {f"counts.{old_bucket}": -1, f"counts.{new_bucket}": 1})
+
+
+def record_post_deleted(owner_id, status) -> None:
+    _apply(owner_id, {"total": -1, f"counts.{_bucket(status)}": -1})
+
+
+def rebuild_post_stats(user_id: str) -> dict:
+    """Recount a user's posts by status in one aggregation and store the result"""
+    for _ in range(POST_STATS_REBUILD_ATTEMPTS):
+        # Create the document first so increments during the aggregation are not dropped
+        current = post_stats_collection.find_one_and_update(
+            {"_id": user_id},
+            {"$setOnInsert": {"counts": {}, "total": 0, "generation": 0}},
+            projection={"generation": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        generation = current.get("generation")
+
+        counts = {}
+        for row in posts_collection.aggregate([
+            {"$match": owner_query(user_id)},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]):
+            bucket = _bucket(row["_id"])
+            counts[bucket] = counts.get(bucket, 0) + row["count"]
+
+        doc = {
+            "_id": user_id,
+            "counts": counts,
+            "total": sum(counts.values()),
+            "generation": generation or 0,
+            "rebuilt_at": datetime.utcnow(),
+        }
+        # generation None also matches documents written before the counter existed
+        result = post_stats_collection.replace_one({"_id": user_id, "generation": generation}, doc)
+        if result.matched_count:
+            return doc
+
+    logger.warning(f"Post stats for user {user_id} kept changing during rebuild; will retry on next read")
+    return doc
+
+
+def get_post_stats(user_id) -> dict:
+    """Dashboard stats for a user, read from the counter document"""
+    user_id = str(user_id)
+    doc = post_stats_collection.find_one({"_id": user_id})
+    stale_before = datetime.utcnow() - timedelta(hours=POST_STATS_REBUILD_HOURS)
+    if doc is None or (doc.get("rebuilt_at") or datetime.min) < stale_before:
+        doc = rebuild_post_stats(user_id)
+
+    counts = doc.get("counts") or {}
+    return {
+        "total_posts": max(doc.get("total", 0), 0),
+        "drafts": max(counts.get("draft", 0), 0),
+        "scheduled": max(counts.get("scheduled", 0), 0),
+        "published": max(counts.get("published", 0), 0),
+    }
@@ -1,5 +1,5 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import pytz
 from app.services.database import (
     posts_collection,
@@ -14,10 +14,19 @@ from app.services.image_service import ImageService
 from app.services.automation_service import AutomationService
 from app.services.decision_engine_service import DecisionEngineService
 from app.services.automation_dispatch_service import AutomationDispatchService
-from app.services.social_accounts import get_platform_credentials
+from app.services.social_accounts import get_platform_credentials, get_platform_credentials_for_users
+from app.services.job_tracker import job_tracker
+from app.services.post_dispatcher import post_dispatcher, DISPATCH_REFRESH_MINUTES
+from app.services.post_stats import record_post_status_change
+from app.services.migrations import run_background_migrations
+from app.services.post_owner import OWNER_PROJECTION, owner_of
+from pymongo import ASCENDING, ReturnDocument
 from pymongo.errors import PyMongoError
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
 import logging
+import os
+import socket
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +42,29 @@ scheduler = BackgroundScheduler(
     },
 )
 
+# Scheduled posts are published on a bounded pool, each under a lease
+SCHEDULED_POST_MAX_WORKERS = 4
+SCHEDULED_POST_LEASE_SECONDS = 15 * 60
+# In-flight leases are extended this often, well before they can expire
+SCHEDULED_POST_LEASE_RENEW_SECONDS = SCHEDULED_POST_LEASE_SECONDS // 3
+SCHEDULED_POST_MAX_ATTEMPTS = 3
+SCHEDULER_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_publish_executor = ThreadPoolExecutor(
+    max_workers=SCHEDULED_POST_MAX_WORKERS,
+    thread_name_prefix="scheduled-publish",
+)
+# post _id -> claimed post document (carries the lease fence)
+_publish_inflight = {}
+_publish_inflight_lock = Lock()
+
+# Automation poll planning: tenants per $in query and credential fields to project
+POLL_PLANNER_BATCH_SIZE = 1000
+POLL_CREDENTIAL_FIELDS = {
+    "facebook": ["page_id", "access_token"],
+    "instagram": ["ig_user_id", "access_token"],
+}
+
 
 def _normalize_hashtags(hashtags):
     normalized = []
@@ -51,185 +83,315 @@ def _build_caption(caption, hashtags):
     return caption_text or hashtag_text
 
 
+def _lease_filter(post: dict) -> dict:
+    """Match the post only while this claim still holds its lease"""
+    return {
+        "_id": post["_id"],
+        "status": "publishing",
+        "lease_owner": post.get("lease_owner"),
+        "publish_attempts": post.get("publish_attempts"),
+    }
+
+
+def _finish_scheduled_post(post: dict, results: dict, any_success: bool):
+    """Record the publish outcome and release the post's lease"""
+    status = "published" if any_success else "draft"
+    published_at = datetime.now(PAKISTAN_TZ) if any_success else None
+    previous = posts_collection.find_one_and_update(
+        _lease_filter(post),
+        {
+            "$set": {
+                "status": status,
+                "published_at": published_at,
+                "platform_results": results
+            },
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        },
+        projection=OWNER_PROJECTION,
+    )
+    if previous:
+        record_post_status_change(owner_of(previous), "publishing", status)
+    else:
+        logger.warning(f"Lease on post {post['_id']} was lost before publishing finished, outcome not recorded")
+
+
+def _publish_scheduled_post(post: dict):
+    """Publish one claimed scheduled post to each of its platforms"""
+    post_id = post["_id"]
+    platforms = post.get("platforms", [])
+    user_id = owner_of(post) or ""
+    
+    if not platforms:
+        logger.warning(f"Post {post_id} has no platforms selected, skipping")
+        _finish_scheduled_post(post, {"error": "No platforms selected"}, False)
+        return
+    
+    # Extract media - support both old 'image' field and new 'media' array
+    image = post.get("image")
+    media = post.get("media") or []
+    
+    # If no direct image, try to extract from media array
+    if not image and media:
+        # Get first image from media array
+        for media_item in media:
+            if isinstance(media_item, dict) and media_item.get("type") in ["image", "photo"]:
+                image = media_item.get("url")
+                break
+    
+    # Instagram requires an image, but Facebook allows text-only posts
+    if "instagram" in platforms and not image:
+        logger.warning(f"Post {post_id} scheduled for Instagram but has no image, skipping")
+        _finish_scheduled_post(post, {"instagram": {"status": "error", "detail": "Image required for Instagram"}}, False)
+        return
+    
+    caption = post.get("caption") or post.get("content")
+    hashtags = post.get("hashtags") or []
+    caption_text = _build_caption(caption or "", hashtags)
+    
+    results = {}
+    any_success = False
+    
+    # Publish to selected platforms
+    if "facebook" in platforms:
+        try:
+            fb_creds = get_platform_credentials(user_id, "facebook") if user_id else None
+            if not fb_creds:
+                results["facebook"] = {"status": "error", "detail": "Facebook account not connected"}
+                logger.warning(f"Post {post_id} has no Facebook credentials, skipping")
+            else:
+                fb_service = FacebookService(
+                    page_id=fb_creds.get("page_id"),
+                    access_token=fb_creds.get("access_token"),
+                )
+                if image:
+                    # Publish with image
+                    results["facebook"] = fb_service.publish_photo(image, caption_text)
+                else:
+                    # Publish text-only
+                    results["facebook"] = fb_service.publish_text(caption_text)
+                logger.info(f"Published post {post_id} to Facebook: {results['facebook']}")
+                if results["facebook"].get("status") == "success":
+                    any_success = True
+        except Exception as e:
+            logger.error(f"Failed to publish post {post_id} to Facebook: {e}")
+            results["facebook"] = {"status": "error", "detail": str(e)}
+    
+    if "instagram" in platforms:
+        try:
+            ig_creds = get_platform_credentials(user_id, "instagram") if user_id else None
+            if not ig_creds:
+                results["instagram"] = {"status": "error", "detail": "Instagram account not connected"}
+                logger.warning(f"Post {post_id} has no Instagram credentials, skipping")
+                raise ValueError("Instagram account not connected")
+
+            insta_service = InstaService(
+                ig_user_id=ig_creds.get("ig_user_id"),
+                access_token=ig_creds.get("access_token"),
+            )
+            
+            # If image is base64, upload to imgbb first to get public URL
+            final_image = image
+            if not final_image:
+                logger.error(f"Post {post_id} scheduled for Instagram but image is missing")
+                raise ValueError("Image required for Instagram")
+            
+            if ImageService.is_base64(final_image):
+                logger.info(f"Converting base64 image to public URL for Instagram post {post_id}")
+                upload_result = ImageService.upload_base64_to_imgbb(final_image)
+                if upload_result["status"] != "success":
+                    logger.error(f"Failed to upload image for Instagram: {upload_result['detail']}")
+                    raise ValueError(f"Image upload failed: {upload_result['detail']}")
+                final_image = upload_result["url"]
+                logger.info(f"Base64 image converted to: {final_image}")
+            else:
+                logger.info(f"Using existing image URL for Instagram: {final_image}")
+            
+            logger.info(f"Posting to Instagram with image: {final_image}")
+            results["instagram"] = insta_service.publish_photo(final_image, caption_text)
+            logger.info(f"Published post {post_id} to Instagram: {results['instagram']}")
+            if results["instagram"].get("status") == "success":
+                any_success = True
+        except Exception as e:
+            logger.error(f"Failed to publish post {post_id} to Instagram: {e}", exc_info=True)
+            results["instagram"] = {"status": "error", "detail": str(e)}
+    
+    # Publish to LinkedIn Personal
+    if "linkedin-personal" in platforms:
+        try:
+            li_personal_creds = get_platform_credentials(user_id, "linkedin-personal") if user_id else None
+            if not li_personal_creds:
+                results["linkedin-personal"] = {"status": "error", "detail": "LinkedIn Personal account not connected"}
+                logger.warning(f"Post {post_id} has no LinkedIn Personal credentials, skipping")
+            else:
+                linkedin_service = LinkedInService(
+                    user_id=li_personal_creds.get("linkedin_user_id"),
+                    access_token=li_personal_creds.get("access_token"),
+                )
+                if image:
+                    # Publish with image
+                    results["linkedin-personal"] = linkedin_service.publish_photo([image], caption_text)
+                else:
+                    # Publish text-only
+                    results["linkedin-personal"] = linkedin_service.publish_text(caption_text)
+                logger.info(f"Published post {post_id} to LinkedIn Personal: {results['linkedin-personal']}")
+                if results["linkedin-personal"].get("status") == "success":
+                    any_success = True
+        except Exception as e:
+            logger.error(f"Failed to publish post {post_id} to LinkedIn Personal: {e}", exc_info=True)
+            results["linkedin-personal"] = {"status": "error", "detail": str(e)}
+    
+    # Publish to LinkedIn Company
+    if "linkedin-company" in platforms:
+        try:
+            li_company_creds = get_platform_credentials(user_id, "linkedin-company") if user_id else None
+            if not li_company_creds:
+                results["linkedin-company"] = {"status": "error", "detail": "LinkedIn Company account not connected"}
+                logger.warning(f"Post {post_id} has no LinkedIn Company credentials, skipping")
+            else:
+                linkedin_service = LinkedInService(
+                    user_id=li_company_creds.get("linkedin_user_id"),
+                    access_token=li_company_creds.get("access_token"),
+                    organization_id=li_company_creds.get("linkedin_organization_id"),
+                )
+                if image:
+                    # Publish with image
+                    results["linkedin-company"] = linkedin_service.publish_photo([image], caption_text)
+                else:
+                    # Publish text-only
+                    results["linkedin-company"] = linkedin_service.publish_text(caption_text)
+                logger.info(f"Published post {post_id} to LinkedIn Company: {results['linkedin-company']}")
+                if results["linkedin-company"].get("status") == "success":
+                    any_success = True
+        except Exception as e:
+            logger.error(f"Failed to publish post {post_id} to LinkedIn Company: {e}", exc_info=True)
+            results["linkedin-company"] = {"status": "error", "detail": str(e)}
+    
+    _finish_scheduled_post(post, results, any_success)
+    logger.info(f"Successfully processed scheduled post {post_id}")
+
+
+def _run_claimed_post(post: dict):
+    """Worker entry point: publish a claimed post, never letting errors escape the pool"""
+    post_id = post["_id"]
+    try:
+        _publish_scheduled_post(post)
+    except Exception as e:
+        logger.error(f"Error publishing scheduled post {post_id}: {e}", exc_info=True)
+        try:
+            _finish_scheduled_post(post, {"error": str(e)}, False)
+        except PyMongoError as mongo_error:
+            # Lease will expire and the post will be reclaimed
+            logger.warning(f"Could not record failure for post {post_id}: {mongo_error}")
+    finally:
+        with _publish_inflight_lock:
+            _publish_inflight.pop(post_id, None)
+
+
+def _claim_due_post(now: datetime):
+    """
+    Atomically claim the oldest due post: scheduled posts whose time has come,
+    or posts whose publishing lease expired (worker died mid-publish).
+    """
+    return posts_collection.find_one_and_update(
+        {
+            "$or": [
+                {"status": "scheduled", "scheduled_at": {"$lte": now}},
+                {
+                    "status": "publishing",
+                    "lease_expires_at": {"$lte": now},
+                    "publish_attempts": {"$lt": SCHEDULED_POST_MAX_ATTEMPTS},
+                },
+            ]
+        },
+        {
+            "$set": {
+                "status": "publishing",
+                "lease_owner": SCHEDULER_WORKER_ID,
+                "lease_expires_at": now + timedelta(seconds=SCHEDULED_POST_LEASE_SECONDS),
+            },
+            "$inc": {"publish_attempts": 1},
+        },
+        sort=[("scheduled_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def renew_publish_leases():
+    """Extend the leases of posts this process is still publishing"""
+    with _publish_inflight_lock:
+        claimed = list(_publish_inflight.values())
+    renewed = 0
+    for post in claimed:
+        try:
+            result = posts_collection.update_one(
+                _lease_filter(post),
+                {"$set": {"lease_expires_at": datetime.now(PAKISTAN_TZ) + timedelta(seconds=SCHEDULED_POST_LEASE_SECONDS)}},
+            )
+        except PyMongoError as e:
+            logger.warning(f"Mongo transient error renewing lease on post {post['_id']}: {e}")
+            continue
+        if result.matched_count:
+            renewed += 1
+        else:
+            logger.warning(f"Lease on post {post['_id']} was lost while publishing")
+    return renewed
+
+
+def _fail_abandoned_posts(now: datetime) -> int:
+    """Posts whose lease expired after the last allowed attempt go back to draft"""
+    failed = 0
+    # One post at a time so each owner's stats counters can be adjusted
+    while True:
+        post = posts_collection.find_one_and_update(
+            {
+                "status": "publishing",
+                "lease_expires_at": {"$lte": now},
+                "publish_attempts": {"$gte": SCHEDULED_POST_MAX_ATTEMPTS},
+            },
+            {
+                "$set": {"status": "draft", "platform_results": {"error": "Publishing did not complete"}},
+                "$unset": {"lease_owner": "", "lease_expires_at": ""},
+            },
+            projection=OWNER_PROJECTION,
+        )
+        if post is None:
+            return failed
+        record_post_status_change(owner_of(post), "publishing", "draft")
+        failed += 1
+
+
 def process_scheduled_posts():
-    """Check for scheduled posts that are due and publish them"""
+    """
+    Claim scheduled posts that are due and hand them to the publish pool.
+    Only claims as many posts as there are free workers, so a lease never
+    runs down while its post waits in a queue, and returns immediately so
+    the next tick starts on time however long individual publishes take.
+    """
     try:
         # Get current time in Pakistani timezone
         now = datetime.now(PAKISTAN_TZ)
         logger.info(f"Checking for scheduled posts at {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
         
-        # Find posts with status="scheduled" and scheduled_at <= now
-        due_posts = posts_collection.find({
-            "status": "scheduled",
-            "scheduled_at": {"$lte": now}
-        })
+        abandoned = _fail_abandoned_posts(now)
+        if abandoned:
+            logger.warning(f"Returned {abandoned} abandoned publishing posts to draft")
         
-        for post in due_posts:
-            post_id = post["_id"]
-            platforms = post.get("platforms", [])
-            user_id = str(post.get("created_by") or post.get("user_id") or "")
-            
-            if not platforms:
-                logger.warning(f"Post {post_id} has no platforms selected, skipping")
-                continue
-            
-            # Extract media - support both old 'image' field and new 'media' array
-            image = post.get("image")
-            media = post.get("media") or []
-            
-            # If no direct image, try to extract from media array
-            if not image and media:
-                # Get first image from media array
-                for media_item in media:
-                    if isinstance(media_item, dict) and media_item.get("type") in ["image", "photo"]:
-                        image = media_item.get("url")
-                        break
-            
-            # Instagram requires an image, but Facebook allows text-only posts
-            if "instagram" in platforms and not image:
-                logger.warning(f"Post {post_id} scheduled for Instagram but has no image, skipping")
-                continue
-            
-            caption = post.get("caption") or post.get("content")
-            hashtags = post.get("hashtags") or []
-            caption_text = _build_caption(caption or "", hashtags)
-            
-            results = {}
-            any_success = False
-            
-            # Publish to selected platforms
-            if "facebook" in platforms:
-                try:
-                    fb_creds = get_platform_credentials(user_id, "facebook") if user_id else None
-                    if not fb_creds:
-                        results["facebook"] = {"status": "error", "detail": "Facebook account not connected"}
-                        logger.warning(f"Post {post_id} has no Facebook credentials, skipping")
-                    else:
-                        fb_service = FacebookService(
-                            page_id=fb_creds.get("page_id"),
-                            access_token=fb_creds.get("access_token"),
-                        )
-                        if image:
-                            # Publish with image
-                            results["facebook"] = fb_service.publish_photo(image, caption_text)
-                        else:
-                            # Publish text-only
-                            results["facebook"] = fb_service.publish_text(caption_text)
-                        logger.info(f"Published post {post_id} to Facebook: {results['facebook']}")
-                        if results["facebook"].get("status") == "success":
-                            any_success = True
-                except Exception as e:
-                    logger.error(f"Failed to publish post {post_id} to Facebook: {e}")
-                    results["facebook"] = {"status": "error", "detail": str(e)}
-            
-            if "instagram" in platforms:
-                try:
-                    ig_creds = get_platform_credentials(user_id, "instagram") if user_id else None
-                    if not ig_creds:
-                        results["instagram"] = {"status": "error", "detail": "Instagram account not connected"}
-                        logger.warning(f"Post {post_id} has no Instagram credentials, skipping")
-                        raise ValueError("Instagram account not connected")
-
-                    insta_service = InstaService(
-                        ig_user_id=ig_creds.get("ig_user_id"),
-                        access_token=ig_creds.get("access_token"),
-                    )
-                    
-                    # If image is base64, upload to imgbb first to get public URL
-                    final_image = image
-                    if not final_image:
-                        logger.error(f"Post {post_id} scheduled for Instagram but image is missing")
-                        results["instagram"] = {"status": "error", "detail": "Image required for Instagram"}
-                        continue
-                    
-                    if ImageService.is_base64(final_image):
-                        logger.info(f"Converting base64 image to public URL for Instagram post {post_id}")
-                        upload_result = ImageService.upload_base64_to_imgbb(final_image)
-                        if upload_result["status"] == "success":
-                            final_image = upload_result["url"]
-                            logger.info(f"Base64 image converted to: {final_image}")
-                        else:
-                            logger.error(f"Failed to upload image for Instagram: {upload_result['detail']}")
-                            results["instagram"] = {"status": "error", "detail": f"Image upload failed: {upload_result['detail']}"}
-                            continue
-                    else:
-                        logger.info(f"Using existing image URL for Instagram: {final_image}")
-                    
-                    logger.info(f"Posting to Instagram with image: {final_image}")
-                    results["instagram"] = insta_service.publish_photo(final_image, caption_text)
-                    logger.info(f"Published post {post_id} to Instagram: {results['instagram']}")
-                    if results["instagram"].get("status") == "success":
-                        any_success = True
-                except Exception as e:
-                    logger.error(f"Failed to publish post {post_id} to Instagram: {e}", exc_info=True)
-                    results["instagram"] = {"status": "error", "detail": str(e)}
-            
-            # Publish to LinkedIn Personal
-            if "linkedin-personal" in platforms:
-                try:
-                    li_personal_creds = get_platform_credentials(user_id, "linkedin-personal") if user_id else None
-                    if not li_personal_creds:
-                        results["linkedin-personal"] = {"status": "error", "detail": "LinkedIn Personal account not connected"}
-                        logger.warning(f"Post {post_id} has no LinkedIn Personal credentials, skipping")
-                    else:
-                        linkedin_service = LinkedInService(
-                            user_id=li_personal_creds.get("linkedin_user_id"),
-                            access_token=li_personal_creds.get("access_token"),
-                        )
-                        if image:
-                            # Publish with image
-                            results["linkedin-personal"] = linkedin_service.publish_photo([image], caption_text)
-                        else:
-                            # Publish text-only
-                            results["linkedin-personal"] = linkedin_service.publish_text(caption_text)
-                        logger.info(f"Published post {post_id} to LinkedIn Personal: {results['linkedin-personal']}")
-                        if results["linkedin-personal"].get("status") == "success":
-                            any_success = True
-                except Exception as e:
-                    logger.error(f"Failed to publish post {post_id} to LinkedIn Personal: {e}", exc_info=True)
-                    results["linkedin-personal"] = {"status": "error", "detail": str(e)}
-            
-            # Publish to LinkedIn Company
-            if "linkedin-company" in platforms:
-                try:
-                    li_company_creds = get_platform_credentials(user_id, "linkedin-company") if user_id else None
-                    if not li_company_creds:
-                        results["linkedin-company"] = {"status": "error", "detail": "LinkedIn Company account not connected"}
-                        logger.warning(f"Post {post_id} has no LinkedIn Company credentials, skipping")
-                    else:
-                        linkedin_service = LinkedInService(
-                            user_id=li_company_creds.get("linkedin_user_id"),
-                            access_token=li_company_creds.get("access_token"),
-                            organization_id=li_company_creds.get("linkedin_organization_id"),
-                        )
-                        if image:
-                            # Publish with image
-                            results["linkedin-company"] = linkedin_service.publish_photo([image], caption_text)
-                        else:
-                            # Publish text-only
-                            results["linkedin-company"] = linkedin_service.publish_text(caption_text)
-                        logger.info(f"Published post {post_id} to LinkedIn Company: {results['linkedin-company']}")
-                        if results["linkedin-company"].get("status") == "success":
-                            any_success = True
-                except Exception as e:
-                    logger.error(f"Failed to publish post {post_id} to LinkedIn Company: {e}", exc_info=True)
-                    results["linkedin-company"] = {"status": "error", "detail": str(e)}
-            
-            # Update post status
-            status = "published" if any_success else "draft"
-            published_at = datetime.now(PAKISTAN_TZ) if any_success else None
-            posts_collection.update_one(
-                {"_id": post_id},
-                {
-                    "$set": {
-                        "status": status,
-                        "published_at": published_at,
-                        "platform_results": results
-                    }
-                }
-            )
-            
-            logger.info(f"Successfully processed scheduled post {post_id}")
+        claimed = 0
+        while True:
+            with _publish_inflight_lock:
+                if len(_publish_inflight) >= SCHEDULED_POST_MAX_WORKERS:
+                    break
+            post = _claim_due_post(now)
+            if not post:
+                break
+            with _publish_inflight_lock:
+                _publish_inflight[post["_id"]] = post
+            _publish_executor.submit(_run_claimed_post, post)
+            claimed += 1
+        
+        if claimed:
+            logger.info(f"Claimed {claimed} scheduled posts for publishing")
+        return claimed
             
     except PyMongoError as e:
         logger.warning(f"Mongo transient error in process_scheduled_posts: {e}")
@@ -239,18 +401,6 @@ def process_scheduled_posts():
 
 # ========== AUTOMATION POLLING JOBS ==========
 
-def _should_poll_now(cursor_state: dict) -> bool:
-    """Check if it's time to poll based on cursor state"""
-    if not cursor_state:
-        return True
-    
-    next_poll_at = cursor_state.get("next_poll_at")
-    if not next_poll_at:
-        return True
-    
-    return datetime.utcnow() >= next_poll_at.replace(tzinfo=None)
-
-
 def _poll_user_automation(service: AutomationService, user_id: str, event_type: str, platform: str) -> int:
     """Poll a single user's platform/event channel and return stored event count."""
     if event_type == "comment_created" and platform == "facebook":
@@ -264,59 +414,84 @@ def _poll_user_automation(service: AutomationService, user_id: str, event_type:
     return 0
 
 
+def _chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _plan_poll_targets(event_type: str, platform: str, force: bool) -> dict:
+    """
+    Decide which tenants to poll with batched reads: enabled settings, one
+    $in query per batch for cursor states that are not yet due (filtered on
+    next_poll_at server-side), and one projected $in query for credentials.
+    """
+    user_ids = [
+        settings["user_id"]
+        for settings in automation_settings_collection.find(
+            {"platform": platform, "enabled": True},
+            {"user_id": 1},
+        )
+    ]
+    plan = {
+        "users_considered": len(user_ids),
+        "users_skipped_not_due": 0,
+        "users_skipped_no_credentials": 0,
+        "targets": [],
+    }
+
+    due_user_ids = user_ids
+    if not force:
+        not_due = set()
+        for batch in _chunked(user_ids, POLL_PLANNER_BATCH_SIZE):
+            not_due.update(
+                state["user_id"]
+                for state in poll_cursor_state_collection.find(
+                    {
+                        "user_id": {"$in": batch},
+                        "platform": platform,
+                        "channel_type": event_type,
+                        "next_poll_at": {"$gt": datetime.utcnow()},
+                    },
+                    {"user_id": 1},
+                )
+            )
+        due_user_ids = [user_id for user_id in user_ids if user_id not in not_due]
+        plan["users_skipped_not_due"] = len(user_ids) - len(due_user_ids)
+
+    credentials_by_user = {}
+    for batch in _chunked(due_user_ids, POLL_PLANNER_BATCH_SIZE):
+        credentials_by_user.update(
+            get_platform_credentials_for_users(batch, platform, POLL_CREDENTIAL_FIELDS.get(platform))
+        )
+
+    for user_id in due_user_ids:
+        creds = credentials_by_user.get(str(user_id))
+        if not creds:
+            logger.warning(f"User {user_id} has no {platform} credentials, skipping")
+            plan["users_skipped_no_credentials"] += 1
+            continue
+        service = AutomationService(
+            fb_page_id=creds.get("page_id") if platform == "facebook" else None,
+            fb_token=creds.get("access_token") if platform == "facebook" else None,
+            ig_user_id=creds.get("ig_user_id") if platform == "instagram" else None,
+            ig_token=creds.get("access_token") if platform == "instagram" else None,
+        )
+        plan["targets"].append((user_id, service))
+    return plan
+
+
 def poll_automation_for_all_users(event_type: str, platform: str, force: bool = False):
-    """Generic polling job that fetches all users and polls each one"""
+    """Generic polling job that plans due tenants in batches and polls them concurrently"""
     try:
         logger.info(f"Starting automation polling: {platform} {event_type}")
         
-        # Get all users who have automation enabled for this platform
-        enabled_settings = list(
-            automation_settings_collection.find({
-                "platform": platform,
-                "enabled": True
-            })
-        )
-        
+        plan = _plan_poll_targets(event_type, platform, force)
+        poll_targets = plan["targets"]
         total_events = 0
-        users_considered = len(enabled_settings)
-        users_polled = 0
-        users_skipped_not_due = 0
-        users_skipped_no_credentials = 0
-        poll_targets = []
-        
-        for settings in enabled_settings:
-            user_id = settings["user_id"]
-            
-            # Check if we should poll based on cursor state
-            cursor_state = poll_cursor_state_collection.find_one({
-                "user_id": user_id,
-                "platform": platform,
-                "channel_type": event_type,
-            })
-            
-            if not force and not _should_poll_now(cursor_state):
-                logger.debug(f"Skipping {platform}/{event_type} for user {user_id} - not time yet")
-                users_skipped_not_due += 1
-                continue
-            
-            # Get user's social credentials
-            creds = get_platform_credentials(user_id, platform)
-            if not creds:
-                logger.warning(f"User {user_id} has no {platform} credentials, skipping")
-                users_skipped_no_credentials += 1
-                continue
-
-            users_polled += 1
-            
-            # Create AutomationService and poll
-            service = AutomationService(
-                fb_page_id=creds.get("page_id") if platform == "facebook" else None,
-                fb_token=creds.get("access_token") if platform == "facebook" else None,
-                ig_user_id=creds.get("ig_user_id") if platform == "instagram" else None,
-                ig_token=creds.get("access_token") if platform == "instagram" else None,
-            )
-            
-            poll_targets.append((user_id, service))
+        users_considered = plan["users_considered"]
+        users_polled = len(poll_targets)
+        users_skipped_not_due = plan["users_skipped_not_due"]
+        users_skipped_no_credentials = plan["users_skipped_no_credentials"]
 
         if poll_targets:
             max_workers = min(8, len(poll_targets))
@@ -501,6 +676,39 @@ def process_automation_retries():
         }
 
 
+def cleanup_publish_jobs():
+    """Evict expired publish jobs from the in-memory job tracker."""
+    try:
+        removed = job_tracker.cleanup_old_jobs()
+        if removed:
+            logger.info(f"Job tracker cleanup: removed {removed} expired jobs")
+        return removed
+    except Exception as e:
+        logger.error(f"Error in cleanup_publish_jobs: {e}", exc_info=True)
+        return 0
+
+
+def apply_background_migrations():
+    """Online data migrations (post owner_id backfill, inline media offload)."""
+    try:
+        run_background_migrations()
+    except PyMongoError as e:
+        logger.warning(f"Mongo transient error in apply_background_migrations: {e}")
+    except Exception as e:
+        logger.error(f"Error in apply_background_migrations: {e}", exc_info=True)
+
+
+def refresh_post_dispatcher():
+    """Reload the dispatcher's heap of posts due within its horizon."""
+    try:
+        tracked = post_dispatcher.refresh()
+        logger.debug(f"Post dispatcher tracking {tracked} upcoming posts")
+        return tracked
+    except PyMongoError as e:
+        logger.warning(f"Mongo transient error in refresh_post_dispatcher: {e}")
+    except Exception as e:
+        logger.error(f"Error in refresh_post_dispatcher: {e}", exc_info=True)
+    return 0
 
 
 def start_scheduler():
@@ -509,7 +717,7 @@ def start_scheduler():
         logger.info("Scheduler already running")
         return
     
-    # Add job to check for scheduled posts every minute
+    # Add job to check for scheduled posts every minute (safety net for the dispatcher)
     scheduler.add_job(
         process_scheduled_posts,
         'interval',
@@ -520,6 +728,16 @@ def start_scheduler():
         max_instances=1,
     )
     
+    scheduler.add_job(
+        renew_publish_leases,
+        'interval',
+        seconds=SCHEDULED_POST_LEASE_RENEW_SECONDS,
+        id='renew_publish_leases',
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+    
     # Add automation polling jobs on a short scheduler cadence; cursor_state gates actual poll timing.
     scheduler.add_job(
         poll_facebook_comments,
@@ -590,10 +808,47 @@ def start_scheduler():
         coalesce=True,
         max_instances=1,
     )
+
+    scheduler.add_job(
+        refresh_post_dispatcher,
+        'interval',
+        minutes=DISPATCH_REFRESH_MINUTES,
+        id='refresh_post_dispatcher',
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+
+    scheduler.add_job(
+        cleanup_publish_jobs,
+        'interval',
+        minutes=5,
+        id='cleanup_publish_jobs',
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+    
+    # Runs shortly after startup, then hourly; completed migrations are skipped
+    scheduler.add_job(
+        apply_background_migrations,
+        'interval',
+        hours=1,
+        next_run_time=datetime.now(PAKISTAN_TZ) + timedelta(minutes=1),
+        id='apply_background_migrations',
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
     
     scheduler.start()
+    try:
+        post_dispatcher.start(process_scheduled_posts)
+    except PyMongoError as e:
+        logger.warning(f"Post dispatcher preload failed, relying on minute tick until refresh: {e}")
     logger.info("APScheduler started with:")
-    logger.info("  - process_scheduled_posts (check every 1 minute)")
+    logger.info(f"  - process_scheduled_posts (check every 1 minute, {SCHEDULED_POST_MAX_WORKERS} publish workers)")
+    logger.info(f"  - renew_publish_leases (every {SCHEDULED_POST_LEASE_RENEW_SECONDS} seconds while posts publish)")
     logger.info("  - poll_facebook_comments (check every 15 seconds, dynamic poll interval: 30-60 sec)")
     logger.info("  - poll_instagram_comments (check every 15 seconds, dynamic poll interval: 30-60 sec)")
     logger.info("  - poll_facebook_dms (check every 30 seconds, dynamic poll interval: 1-2 min)")
@@ -601,6 +856,9 @@ def start_scheduler():
     logger.info("  - process_automation_decisions (check every 15 seconds)")
     logger.info("  - process_automation_dispatch (check every 15 seconds)")
     logger.info("  - process_automation_retries (check every 30 seconds)")
+    logger.info(f"  - refresh_post_dispatcher (every {DISPATCH_REFRESH_MINUTES} minutes, fires posts on time)")
+    logger.info("  - cleanup_publish_jobs (check every 5 minutes)")
+    logger.info("  - apply_background_migrations (hourly, skips completed migrations)")
 
 
 def shutdown_scheduler():
@@ -608,3 +866,6 @@ def shutdown_scheduler():
     if scheduler.running:
         scheduler.shutdown()
         logger.info("APScheduler shut down")
+    post_dispatcher.stop()
+    # In-flight publishes keep their leases; unstarted work is reclaimed after expiry
+    _publish_executor.shutdown(wait=False, cancel_futures=True)
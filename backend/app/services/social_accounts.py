@@ -1,10 +1,21 @@
+import time
+from collections import OrderedDict
 from datetime import datetime
+from threading import Lock
 from bson import ObjectId
 from app.services.database import users_collection
 
 
 SUPPORTED_PLATFORMS = {"facebook", "instagram", "linkedin", "linkedin-personal", "linkedin-company"}
 
+# Per-process credentials cache: (user_id, platform) -> (expires_at, credentials or None).
+# Writes through this module invalidate immediately; other workers see changes within the TTL.
+CREDENTIALS_CACHE_TTL_SECONDS = 60
+CREDENTIALS_CACHE_MAX_ENTRIES = 10000
+
+_credentials_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_credentials_cache_lock = Lock()
+
 
 def _ensure_platform(platform: str) -> str:
     normalized = (platform or "").strip().lower()
@@ -13,15 +24,90 @@ def _ensure_platform(platform: str) -> str:
     return normalized
 
 
+def _cache_get(key: tuple):
+    """Return (hit, credentials) for a cache key"""
+    with _credentials_cache_lock:
+        entry = _credentials_cache.get(key)
+        if entry is None:
+            return False, None
+        expires_at, credentials = entry
+        if expires_at <= time.monotonic():
+            del _credentials_cache[key]
+            return False, None
+        _credentials_cache.move_to_end(key)
+        return True, credentials
+
+
+def _cache_put(key: tuple, credentials: dict | None) -> None:
+    with _credentials_cache_lock:
+        _credentials_cache[key] = (time.monotonic() + CREDENTIALS_CACHE_TTL_SECONDS, credentials)
+        _credentials_cache.move_to_end(key)
+        while len(_credentials_cache) > CREDENTIALS_CACHE_MAX_ENTRIES:
+            _credentials_cache.popitem(last=False)
+
+
+def invalidate_platform_credentials(user_id: str, platform: str | None = None) -> None:
+    """Drop cached credentials for one platform, or for every platform of the user"""
+    platforms = [_ensure_platform(platform)] if platform else SUPPORTED_PLATFORMS
+    with _credentials_cache_lock:
+        for normalized in platforms:
+            _credentials_cache.pop((str(user_id), normalized), None)
+
+
 def get_user_social_accounts(user_id: str) -> dict:
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
-    return (user or {}).get("social_accounts", {})
+    user = users_collection.find_one({"_id": ObjectId(user_id)}, {"social_accounts": 1})
+    accounts = (user or {}).get("social_accounts", {})
+    for platform in SUPPORTED_PLATFORMS:
+        credentials = accounts.get(platform)
+        _cache_put((str(user_id), platform), dict(credentials) if credentials is not None else None)
+    return accounts
 
 
 def get_platform_credentials(user_id: str, platform: str) -> dict | None:
     normalized = _ensure_platform(platform)
-    accounts = get_user_social_accounts(user_id)
-    return accounts.get(normalized)
+    key = (str(user_id), normalized)
+    hit, credentials = _cache_get(key)
+    if not hit:
+        user = users_collection.find_one(
+            {"_id": ObjectId(user_id)},
+            {f"social_accounts.{normalized}": 1},
+        )
+        credentials = ((user or {}).get("social_accounts") or {}).get(normalized)
+        _cache_put(key, credentials)
+    # Callers sometimes annotate the dict; never hand out the cached instance
+    return dict(credentials) if credentials is not None else None
+
+
+def get_platform_credentials_for_users(
+    user_ids: list[str],
+    platform: str,
+    fields: list[str] | None = None,
+) -> dict[str, dict]:
+    """
+    Batch-load one platform's credentials for many users in a single query,
+    projecting only the requested credential fields. Users without the
+    platform connected are absent from the result.
+    """
+    normalized = _ensure_platform(platform)
+    object_ids = []
+    for user_id in user_ids:
+        try:
+            object_ids.append(ObjectId(user_id))
+        except Exception:
+            continue
+    if not object_ids:
+        return {}
+
+    if fields:
+        projection = {f"social_accounts.{normalized}.{field}": 1 for field in fields}
+    else:
+        projection = {f"social_accounts.{normalized}": 1}
+    credentials_by_user = {}
+    for user in users_collection.find({"_id": {"$in": object_ids}}, projection):
+        credentials = (user.get("social_accounts") or {}).get(normalized)
+        if credentials:
+            credentials_by_user[str(user["_id"])] = credentials
+    return credentials_by_user
 
 
 def set_platform_credentials(user_id: str, platform: str, credentials: dict) -> None:
@@ -33,6 +119,7 @@ def set_platform_credentials(user_id: str, platform: str, credentials: dict) ->
         }
     }
     users_collection.update_one({"_id": ObjectId(user_id)}, {"$set": update})
+    invalidate_platform_credentials(user_id, normalized)
 
 
 def remove_platform_credentials(user_id: str, platform: str) -> None:
@@ -41,6 +128,7 @@ def remove_platform_credentials(user_id: str, platform: str) -> None:
         {"_id": ObjectId(user_id)},
         {"$unset": {f"social_accounts.{normalized}": ""}},
     )
+    invalidate_platform_credentials(user_id, normalized)
 
 
 def mask_token(token: str | None) -> str | None:
@@ -67,14 +67,14 @@ export default function Profile() {
   const fetchPostCount = useCallback(async () => {
       const token = localStorage.getItem("token");
       try {
-        const res = await fetch(apiUrl("/posts/user-posts"), {
+        const res = await fetch(apiUrl("/posts/stats"), {
           method: "GET",
           headers: { Authorization: `Bearer ${token}` },
         });
 
         if (res.ok) {
           const data = await res.json();
-          setSavedPosts((data.posts || []).length);
+          setSavedPosts(data?.stats?.total_posts || 0);
         }
       } catch (error) {
         setSavedPosts(0);
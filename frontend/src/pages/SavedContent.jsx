@@ -1,4 +1,4 @@
-import React, { useCallback, useEffect, useMemo, useState } from "react";
+import React, { useCallback, useEffect, useMemo, useRef, useState } from "react";
 import ProfilePostCard from "../components/profile/ProfilePostCard";
 import EditPostModal from "../components/profile/EditPostModal";
 import SchedulePostModal from "../components/profile/SchedulePostModal";
@@ -8,10 +8,17 @@ import { apiUrl } from "../config/api";
 import useSessionStorageState from "../hooks/useSessionStorageState";
 import { RefreshCw } from "lucide-react";
 
+// Posts the scheduler is publishing still belong to the scheduled tab
+const TAB_STATUSES = { scheduled: ["scheduled", "publishing"] };
+const tabStatus = (status) => (status === "publishing" ? "scheduled" : status || "draft");
+
 export default function SavedContent() {
   const [posts, setPosts] = useSessionStorageState("saved-content.posts", []);
   const [filterStatus, setFilterStatus] = useSessionStorageState("saved-content.filterStatus", "all");
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const latestRequestRef = useRef(0);
   const [error, setError] = useState("");
   const [connectedAccounts, setConnectedAccounts] = useSessionStorageState("saved-content.connectedAccounts", {
     facebook: { connected: false },
@@ -73,42 +80,75 @@ export default function SavedContent() {
 
   const fetchSavedPosts = useCallback(async (options = {}) => {
     const background = Boolean(options.background);
-    if (!background) {
+    const cursor = options.cursor || null;
+    if (cursor) {
+      setLoadingMore(true);
+    } else if (!background) {
       setLoading(true);
     }
     setError("");
+    // Responses to older requests (e.g. a previous tab) are dropped
+    const requestId = ++latestRequestRef.current;
+    const isLatest = () => requestId === latestRequestRef.current;
+
+    const params = new URLSearchParams({ limit: "24" });
+    if (filterStatus !== "all") {
+      params.set("status", (TAB_STATUSES[filterStatus] || [filterStatus]).join(","));
+    }
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
 
     try {
-      const response = await fetch(apiUrl("/posts/user-posts"), {
+      const response = await fetch(apiUrl(`/posts/user-posts?${params.toString()}`), {
         method: "GET",
         headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
       });
 
       const data = await response.json();
+      if (!isLatest()) {
+        return;
+      }
       if (!response.ok) {
         setError(data?.detail || "Failed to load saved content.");
-        setPosts([]);
+        if (!cursor) {
+          setPosts([]);
+        }
         return;
       }
 
       const normalizedPosts = Array.isArray(data?.posts) ? data.posts : [];
-      setPosts(normalizedPosts);
+      setPosts((prev) => (cursor ? [...prev, ...normalizedPosts] : normalizedPosts));
+      setNextCursor(data?.pagination?.next_cursor || null);
       setHasLoadedSavedContent(true);
 
       const platformSelection = {};
       normalizedPosts.forEach((post) => {
         platformSelection[post._id] = Array.isArray(post.platforms) ? post.platforms : [];
       });
-      setSelectedPlatforms(platformSelection);
+      setSelectedPlatforms((prev) => (cursor ? { ...prev, ...platformSelection } : platformSelection));
     } catch (_fetchError) {
+      if (!isLatest()) {
+        return;
+      }
       setError("Failed to load saved content.");
-      setPosts([]);
+      if (!cursor) {
+        setPosts([]);
+      }
     } finally {
-      if (!background) {
+      if (cursor) {
+        setLoadingMore(false);
+      } else if (!background && isLatest()) {
         setLoading(false);
       }
     }
-  }, [setHasLoadedSavedContent, setPosts, setSelectedPlatforms]);
+  }, [filterStatus, setHasLoadedSavedContent, setPosts, setSelectedPlatforms]);
+
+  const loadMorePosts = () => {
+    if (nextCursor && !loadingMore) {
+      fetchSavedPosts({ cursor: nextCursor });
+    }
+  };
 
   useEffect(() => {
     if (hasLoadedSavedContent) {
@@ -128,7 +168,7 @@ export default function SavedContent() {
     if (filterStatus === "all") {
       return posts;
     }
-    return posts.filter((post) => (post?.status || "draft") === filterStatus);
+    return posts.filter((post) => tabStatus(post?.status) === filterStatus);
   }, [posts, filterStatus]);
 
   const formatPakistaniTime = (isoDate) => {
@@ -338,16 +378,33 @@ export default function SavedContent() {
     }
   };
 
-  const openEdit = (post) => {
+  const openEdit = async (post) => {
     setEditModal({
       open: true,
       postId: post._id,
       caption: post.caption || "",
       hashtags: Array.isArray(post.hashtags) ? post.hashtags.join(" ") : "",
-      image: post.image || "",
+      image: "",
       platforms: Array.isArray(post.platforms) ? post.platforms : [],
     });
     setEditStatus({ loading: false, message: "" });
+
+    // The listing only carries summaries; load the full image for editing
+    try {
+      const response = await fetch(apiUrl(`/posts/${post._id}`), {
+        headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+      });
+      if (!response.ok) {
+        return;
+      }
+      const data = await response.json();
+      const image = data?.post?.image;
+      if (image) {
+        setEditModal((prev) => (prev.postId === post._id ? { ...prev, image } : prev));
+      }
+    } catch (_err) {
+      // Editing caption and hashtags still works without the image.
+    }
   };
 
   const closeEdit = () => {
@@ -391,7 +448,8 @@ export default function SavedContent() {
         body: JSON.stringify({
           caption: editModal.caption,
           hashtags,
-          image: editModal.image,
+          // Leave the stored image untouched if it was never loaded or replaced
+          image: editModal.image || undefined,
         }),
       });
       const data = await response.json();
@@ -451,6 +509,9 @@ export default function SavedContent() {
   };
 
   const getThumbnail = (post) => {
+    if (post?.thumbnail) {
+      return post.thumbnail;
+    }
     if (post?.image) {
       return post.image;
     }
@@ -533,6 +594,19 @@ export default function SavedContent() {
         </div>
       )}
 
+      {!loading && !error && nextCursor && (
+        <div className="mt-6 flex justify-center">
+          <button
+            type="button"
+            onClick={loadMorePosts}
+            disabled={loadingMore}
+            className="rounded-full border border-white/10 bg-white/5 px-5 py-2 text-sm font-semibold text-white transition hover:bg-white/10 disabled:opacity-60"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
+
       <SchedulePostModal
         open={scheduleModal.open}
         scheduleModal={scheduleModal}